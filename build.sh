@@ -2,3 +2,4 @@
 pip install -r requirements.txt
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
+python manage.py refresh_image_urls
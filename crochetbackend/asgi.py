@@ -5,12 +5,42 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+Production serves this (see Procfile) so the async payment views don't
+hold a worker while waiting on Razorpay. Lifespan events close each
+worker's pooled Razorpay connections on shutdown.
+
+The trade-off, measured with `manage.py loadtest_payments` on one CPU:
+sync catalog views cost more under ASGI (each runs in a thread handed
+off from the event loop), about 145 vs 240 catalog req/s with nothing
+else going on. But while 32 payment calls wait on a slow Razorpay, WSGI
+falls to ~1.4 req/s (every worker is stuck waiting), while ASGI keeps
+serving 45-60. A single web process can't split routes between two
+servers, so ASGI serves everything: a stalled payment provider takes
+the whole storefront down otherwise. Raise WEB_CONCURRENCY to buy the
+idle-time throughput back.
 """
 
 import os
 
 from django.core.asgi import get_asgi_application
 
+from shop.payments import close_async_razorpay_client
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crochetbackend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    if scope["type"] != "lifespan":
+        return await django_application(scope, receive, send)
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_razorpay_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
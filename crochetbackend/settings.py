@@ -104,6 +104,49 @@ else:
         }
     }
 
+# ---------------------------------------------------------
+# CACHE
+# ---------------------------------------------------------
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    # Per-process; set REDIS_URL so all workers share one catalog version
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+# Upper bound on how long a cached catalog response lives (seconds)
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+
+# How long checkout holds stock for an unpaid order (seconds)
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", "900"))
+
+# Unpaid orders older than this are cancelled by `manage.py expire_orders`
+# (seconds; keep it above STOCK_RESERVATION_TTL to let late payments land)
+PENDING_ORDER_TTL = int(os.getenv("PENDING_ORDER_TTL", "3600"))
+
+# Delivered / cancelled orders older than this move to the archive table
+# (`manage.py archive_orders`; days)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "180"))
+
+# How often buffered product views are written to the DB (seconds)
+VIEW_COUNT_FLUSH_INTERVAL = float(os.getenv("VIEW_COUNT_FLUSH_INTERVAL", "10"))
+
+# Idempotency-Key replays: how long a stored response is kept (seconds),
+# and how long a duplicate waits for the in-flight original
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+
 # ---------------------------------------------------------
 # PASSWORD VALIDATION
 # ---------------------------------------------------------
@@ -158,6 +201,38 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Page size for the cursor-paginated list views (see shop/pagination.py)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "24"))
+
+# ---------------------------------------------------------
+# AUTH0
+# ---------------------------------------------------------
+AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
+AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
+AUTH0_ISSUER = os.getenv("AUTH0_ISSUER", f"https://{AUTH0_DOMAIN}/")
+
+# JWKS key store (shop/utils/jwks.py), seconds
+AUTH0_JWKS_TTL = int(os.getenv("AUTH0_JWKS_TTL", "3600"))
+AUTH0_JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("AUTH0_JWKS_MIN_REFRESH_INTERVAL", "30"))
+
+# Verified-token LRU (shop/utils/token_cache.py); 0 disables it
+AUTH0_TOKEN_CACHE_SIZE = int(os.getenv("AUTH0_TOKEN_CACHE_SIZE", "10000"))
+
+# ---------------------------------------------------------
+# RAZORPAY
+# ---------------------------------------------------------
+RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
+RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+# point at `manage.py fake_razorpay` for local testing
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com")
+
+# Pooled HTTP client (shop/payments.py): seconds, connections, retries
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", "3.05"))
+RAZORPAY_READ_TIMEOUT = float(os.getenv("RAZORPAY_READ_TIMEOUT", "10"))
+RAZORPAY_POOL_SIZE = int(os.getenv("RAZORPAY_POOL_SIZE", "10"))
+RAZORPAY_MAX_RETRIES = int(os.getenv("RAZORPAY_MAX_RETRIES", "2"))
+
 # ---------------------------------------------------------
 # HTTPS FIX FOR RENDER
 # ---------------------------------------------------------
@@ -1,12 +1,20 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .cache import bump_catalog_version
 from .models import (
     Category,
     Product,
     ProductImage,
+    ProductStockShard,
     Address,
     Wishlist,
     Order,
     OrderItem,
+    WebhookEvent,
+    ArchivedOrder,
 )
 
 # =================================================
@@ -27,16 +35,64 @@ class ProductImageInline(admin.TabularInline):
     extra = 1
 
 
+# =================================================
+# 🧮 STOCK SHARDS (INLINE, READ-ONLY)
+# =================================================
+# Change shard layout with `manage.py rebalance_stock`, not by hand
+class ProductStockShardInline(admin.TabularInline):
+    model = ProductStockShard
+    extra = 0
+    can_delete = False
+    readonly_fields = ("index", "stock")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 # =================================================
 # 🛍️ PRODUCT
 # =================================================
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "price", "stock", "view_count", "created_at")
+    list_display = (
+        "name",
+        "price",
+        "stock",
+        "reserved",
+        "shard_count",
+        "view_count",
+        "created_at",
+    )
     prepopulated_fields = {"slug": ("name",)}
     search_fields = ("name",)
     list_filter = ("created_at", "category")
-    inlines = [ProductImageInline]
+    # counters written by checkout and the view flusher, never by the form
+    readonly_fields = ("reserved", "shard_count", "view_count")
+    inlines = [ProductImageInline, ProductStockShardInline]
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        field = super().formfield_for_dbfield(db_field, request, **kwargs)
+        if db_field.name == "stock":
+            # post back the value the editor saw, to apply the edit as a delta
+            field.show_hidden_initial = True
+        return field
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+
+        # the row may have moved on since the form was loaded: save only
+        # the edited fields, and apply a stock edit as a delta on the
+        # current value (never below what is held)
+        obj.save(update_fields=[name for name in form.changed_data if name != "stock"])
+
+        seen = form.data.get(form.add_initial_prefix("stock"), form.initial["stock"])
+        delta = obj.stock - int(seen)
+        if delta:
+            Product.objects.filter(pk=obj.pk).update(
+                stock=Greatest(F("stock") + delta, F("reserved"))
+            )
+            transaction.on_commit(bump_catalog_version)
 
 
 # =================================================
@@ -77,6 +133,7 @@ class OrderAdmin(admin.ModelAdmin):
         "id",
         "auth0_user_id",
         "total_amount",
+        "item_count",
         "status",
         "payment_method",
         "created_at",
@@ -84,4 +141,44 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ("status", "payment_method", "created_at")
     search_fields = ("auth0_user_id", "razorpay_order_id")
     inlines = [OrderItemInline]
-    readonly_fields = ("razorpay_order_id", "razorpay_payment_id", "razorpay_signature")
+    readonly_fields = (
+        "razorpay_order_id",
+        "razorpay_payment_id",
+        "razorpay_signature",
+        "item_count",
+        "preview_image",
+    )
+
+
+# =================================================
+# 📥 WEBHOOK INBOX
+# =================================================
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "event_id",
+        "event",
+        "received_at",
+        "processed_at",
+        "attempts",
+        "next_attempt_at",
+    )
+    list_filter = ("event", "processed_at")
+    search_fields = ("event_id",)
+    readonly_fields = ("event_id", "event", "payload", "received_at")
+
+
+# =================================================
+# 🗄️ ARCHIVED ORDERS
+# =================================================
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "auth0_user_id", "total_amount", "status", "created_at", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("=id", "auth0_user_id", "razorpay_order_id")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
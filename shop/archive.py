@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Address, ArchivedOrder, Order, OrderItem
+
+
+# =================================================
+# 🗄️ COLD ORDER ARCHIVE
+# =================================================
+# Delivered and cancelled orders older than ORDER_ARCHIVE_AFTER_DAYS move
+# to ArchivedOrder, one row per order with its items as a JSON snapshot,
+# so Order / OrderItem (and their indexes) only hold recent and open
+# orders. Archived rows keep the order's id; order history and detail
+# read both tables (see MergedRows in shop/pagination.py).
+
+ARCHIVED_STATUSES = ("delivered", "cancelled")
+
+ADDRESS_FIELDS = ("name", "phone", "street", "city", "pincode", "address_type")
+
+
+def _snapshots(order_ids):
+    items = {order_id: [] for order_id in order_ids}
+    for order_id, product_id, name, price, quantity in (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .order_by("id")
+        .values_list("order_id", "product_id", "product__name", "price", "quantity")
+    ):
+        items[order_id].append({
+            "product_id": product_id,
+            "name": name,
+            "price": str(price),
+            "quantity": quantity,
+        })
+    return items
+
+
+def archive_orders(older_than_days=None, batch_size=500):
+    """
+    Move finished orders older than `older_than_days` into ArchivedOrder.
+    Per batch: one locked SELECT of orders, one of their items, one of
+    their addresses, one INSERT and one DELETE. Returns the number of
+    orders archived.
+    """
+    if older_than_days is None:
+        older_than_days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(status__in=ARCHIVED_STATUSES, created_at__lt=cutoff)
+                .order_by("created_at", "id")[:batch_size]
+            )
+            if not orders:
+                break
+
+            items = _snapshots([order.id for order in orders])
+            addresses = {
+                address["id"]: {field: address[field] for field in ADDRESS_FIELDS}
+                for address in Address.objects.filter(
+                    id__in={order.address_id for order in orders}
+                ).values("id", *ADDRESS_FIELDS)
+            }
+
+            ArchivedOrder.objects.bulk_create(
+                [
+                    ArchivedOrder(
+                        id=order.id,
+                        auth0_user_id=order.auth0_user_id,
+                        total_amount=order.total_amount,
+                        payment_method=order.payment_method,
+                        razorpay_order_id=order.razorpay_order_id,
+                        razorpay_payment_id=order.razorpay_payment_id,
+                        status=order.status,
+                        item_count=order.item_count,
+                        preview_image=order.preview_image,
+                        items=items[order.id],
+                        address=addresses.get(order.address_id),
+                        created_at=order.created_at,
+                    )
+                    for order in orders
+                ]
+            )
+            Order.objects.filter(id__in=[order.id for order in orders]).delete()
+
+        archived += len(orders)
+
+    return archived
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import secrets
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# =================================================
+# 🔢 CATALOG VERSION
+# =================================================
+CATALOG_VERSION_KEY = "catalog:version"
+
+# How long a builder may hold the cross-process rebuild lock (seconds)
+BUILD_LOCK_TIMEOUT = 10
+BUILD_WAIT_INTERVAL = 0.05
+
+# Striped in-process locks: one build per key per process
+_BUILD_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def get_catalog_version():
+    """
+    Current catalog version. Every cached catalog response is stored under
+    it, so bumping the version invalidates all of them at once.
+    Seeded from the clock so a cache flush never reuses an old version.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # key missing (first write or evicted)
+        version = int(time.time() * 1000)
+        cache.set(CATALOG_VERSION_KEY, version, None)
+        return version
+
+
+# =================================================
+# 🧱 COALESCED CACHE FILL
+# =================================================
+def get_or_build(key, build, timeout):
+    """
+    cache.get(key), falling back to build() on a miss.
+    Concurrent misses on the same key are coalesced:
+    - threads in this process wait on a striped lock
+    - other processes wait on a short-lived `cache.add` lock
+    so a cold cache triggers one build per key instead of a stampede.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _BUILD_LOCKS[zlib.crc32(key.encode()) % len(_BUILD_LOCKS)]:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        # the token marks the lock as ours: only its owner may release it
+        lock_key, token = f"{key}:lock", secrets.token_hex(8)
+        acquired = cache.add(lock_key, token, BUILD_LOCK_TIMEOUT)
+        if not acquired:
+            value = _wait_for(key, lock_key)
+            if value is not None:
+                return value
+            # the holder gave up or timed out: build, taking the lock if free
+            acquired = cache.add(lock_key, token, BUILD_LOCK_TIMEOUT)
+
+        try:
+            value = build()
+            cache.set(key, value, timeout)
+        finally:
+            # not ours if it expired and another process took it since
+            if acquired and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+        return value
+
+
+def _wait_for(key, lock_key):
+    """Poll until another process fills `key` or gives up its lock."""
+    deadline = time.monotonic() + BUILD_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_WAIT_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return None
+
+
+# =================================================
+# 🛍 CATALOG RESPONSE CACHE (VIEW MIXIN)
+# =================================================
+class CatalogCacheMixin:
+    """
+    Caches the serialized body of public catalog GETs under the current
+    catalog version. Signals in shop/signals.py bump the version once a
+    change to a Product, ProductImage or Category commits, so admin edits
+    show up immediately in every worker sharing the cache (REDIS_URL). With
+    the per-process LocMem fallback only the worker that handled the edit
+    sees the bump; the others serve their copy until the timeout.
+
+    Each cache entry carries a strong ETag (hash of the body) and its build
+    time, so conditional GETs (If-None-Match / If-Modified-Since) are
+    answered with a 304 straight from the cache, without touching the
+    database or the serializer.
+    """
+
+    catalog_cache_timeout = settings.CATALOG_CACHE_TIMEOUT
+
+    def get_catalog_cache_key(self, request):
+        return f"catalog-response:{get_catalog_version()}:{request.get_full_path()}"
+
+    def get_uncached(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_catalog_entry(self, request, *args, **kwargs):
+        def build():
+            data = self.get_uncached(request, *args, **kwargs).data
+            body = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+            return {
+                "data": data,
+                "etag": f'"{hashlib.md5(body).hexdigest()}"',
+                "built_at": int(time.time()),
+            }
+
+        return get_or_build(
+            self.get_catalog_cache_key(request), build, self.catalog_cache_timeout
+        )
+
+    def catalog_response(self, request, entry):
+        response = Response(entry["data"])
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["built_at"])
+
+        # 304 (headers only) when the client's copy is current
+        return get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=entry["built_at"],
+            response=response,
+        )
+
+    def get(self, request, *args, **kwargs):
+        return self.catalog_response(
+            request, self.get_catalog_entry(request, *args, **kwargs)
+        )
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+# =================================================
+# 🔁 IDEMPOTENCY KEYS
+# =================================================
+# A client retrying a POST sends the same `Idempotency-Key` header; the
+# first request runs, its response is stored, and every retry gets that
+# response back without running the view again. A duplicate that arrives
+# while the original is still running waits for it instead of racing it.
+#
+# Keys live in the DB rather than the cache: the unique insert is the
+# lock, and it has to hold across every worker process.
+
+POLL_INTERVAL = 0.05
+
+# a request still "in progress" after this long died without cleaning up
+ABANDONED_AFTER = timedelta(seconds=60)
+
+IN_PROGRESS = {"error": "A request with this Idempotency-Key is in progress"}
+
+
+def _request_hash(request):
+    # parsed body: DRF's request.data, or the one AsyncAuth0View attaches
+    body = json.dumps(request.data, sort_keys=True, default=str).encode()
+    return hashlib.sha256(body).hexdigest()
+
+
+def _respond(request, data, status):
+    if isinstance(request, Request):
+        return Response(data, status=status)
+    return JsonResponse(data, status=status, safe=False)
+
+
+def _replay(request, record):
+    response = _respond(request, record.response, record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _stored_body(response):
+    # store exactly what the client saw (DRF renders Decimal etc.)
+    if hasattr(response, "data"):
+        return json.loads(JSONRenderer().render(response.data) or "null")
+    return json.loads(response.content or "null")
+
+
+def _claim(lookup, request_hash):
+    """Insert the key; returns the new record, or None if it already exists."""
+    now = timezone.now()
+    IdempotencyKey.objects.filter(**lookup).filter(
+        Q(expires_at__lte=now)
+        | Q(status_code__isnull=True, created_at__lte=now - ABANDONED_AFTER)
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                **lookup,
+                request_hash=request_hash,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+    except IntegrityError:
+        return None
+
+
+def _lookup(request, endpoint):
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return None
+    return {"auth0_user_id": request.auth0_user_id, "endpoint": endpoint, "key": key}
+
+
+def _check(request, existing, request_hash):
+    """Response for a duplicate whose original is done (or misused), else None."""
+    if existing.request_hash != request_hash:
+        return _respond(
+            request,
+            {"error": "Idempotency-Key already used with a different request"},
+            422,
+        )
+    if existing.status_code is not None:
+        return _replay(request, existing)
+    return None
+
+
+def _finish(record, response):
+    if response.status_code >= 500:
+        record.delete()
+        return
+
+    record.status_code = response.status_code
+    record.response = _stored_body(response)
+    record.save(update_fields=["status_code", "response"])
+
+
+def idempotent(endpoint):
+    """
+    Honour `Idempotency-Key` on a POST handler (DRF or async Django view).
+    Put it above @transaction.atomic: the key must be committed before the
+    view runs so concurrent duplicates can see it.
+
+    Responses below 500 are stored and replayed; exceptions and 5xx
+    release the key so the client can retry.
+    """
+    def decorator(handler):
+        if asyncio.iscoroutinefunction(handler):
+            return _async_wrapper(handler, endpoint)
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            lookup = _lookup(request, endpoint)
+            if not lookup:
+                return handler(self, request, *args, **kwargs)
+            if len(lookup["key"]) > 255:
+                return _respond(request, {"error": "Idempotency-Key too long"}, 400)
+
+            request_hash = _request_hash(request)
+            deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+            while not (record := _claim(lookup, request_hash)):
+                existing = IdempotencyKey.objects.filter(**lookup).first()
+                if existing is None:
+                    # the original failed and released the key: run it ourselves
+                    continue
+
+                if response := _check(request, existing, request_hash):
+                    return response
+
+                if time.monotonic() >= deadline:
+                    return _respond(request, IN_PROGRESS, 409)
+                time.sleep(POLL_INTERVAL)
+
+            try:
+                response = handler(self, request, *args, **kwargs)
+            except BaseException:
+                record.delete()
+                raise
+
+            _finish(record, response)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _async_wrapper(handler, endpoint):
+    """idempotent() for async views: same steps, waiting without a thread."""
+    claim = sync_to_async(_claim)
+    finish = sync_to_async(_finish)
+
+    @wraps(handler)
+    async def wrapper(self, request, *args, **kwargs):
+        lookup = _lookup(request, endpoint)
+        if not lookup:
+            return await handler(self, request, *args, **kwargs)
+        if len(lookup["key"]) > 255:
+            return _respond(request, {"error": "Idempotency-Key too long"}, 400)
+
+        request_hash = _request_hash(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while not (record := await claim(lookup, request_hash)):
+            existing = await IdempotencyKey.objects.filter(**lookup).afirst()
+            if existing is None:
+                continue
+
+            if response := _check(request, existing, request_hash):
+                return response
+
+            if time.monotonic() >= deadline:
+                return _respond(request, IN_PROGRESS, 409)
+            await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            response = await handler(self, request, *args, **kwargs)
+        except BaseException:
+            await record.adelete()
+            raise
+
+        await finish(record, response)
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    return IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -0,0 +1,44 @@
+import cloudinary
+from cloudinary import CloudinaryResource
+from cloudinary.models import CloudinaryField
+
+
+# =================================================
+# 🖼️ CLOUDINARY DELIVERY URLS
+# =================================================
+# Built once when a ProductImage is saved and stored in `ProductImage.urls`,
+# so serializing images never runs the Cloudinary URL builder.
+# f_auto lets Cloudinary serve WebP/AVIF to browsers that accept them.
+
+IMAGE_VARIANTS = {
+    "thumbnail": {"width": 150, "height": 150, "crop": "fill"},
+    "card": {"width": 400, "height": 400, "crop": "fill"},
+    "full": {"width": 1600, "crop": "limit"},
+}
+
+
+def image_urls(image):
+    """{"original": ..., "thumbnail": ..., "card": ..., "full": ...} or {}"""
+    if not isinstance(image, CloudinaryResource) or not cloudinary.config().cloud_name:
+        return {}
+
+    urls = {"original": image.url}
+    for name, options in IMAGE_VARIANTS.items():
+        urls[name] = image.build_url(
+            secure=True, fetch_format="auto", quality="auto", **options
+        )
+    return urls
+
+
+def image_url(urls, image, variant):
+    """
+    One delivery URL for a ProductImage row read with `.values()`: the
+    stored one, or built from the raw `image` value when `urls` hasn't
+    been filled in yet (rows older than `manage.py refresh_image_urls`).
+    None if neither yields one.
+    """
+    if urls and urls.get(variant):
+        return urls[variant]
+    if not image:
+        return None
+    return image_urls(CloudinaryField().to_python(image)).get(variant)
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shop.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered and cancelled orders older than --older-than-days "
+        "(default ORDER_ARCHIVE_AFTER_DAYS) into the archive table, in "
+        "batches. Order history keeps showing them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        archived = archive_orders(
+            older_than_days=options["older_than_days"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} orders in {elapsed:.1f}s"))
@@ -0,0 +1,85 @@
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from jose import jwk, jwt
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from shop.permissions import IsAuthenticatedWithAuth0
+from shop.utils.jwks import jwks_store
+from shop.utils.token_cache import verified_tokens
+
+DOMAIN = "benchmark.invalid"
+AUDIENCE = "benchmark-api"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request cost of IsAuthenticatedWithAuth0 with the "
+        "verified-token cache on and off. Uses a locally generated RSA "
+        "keypair and a stub JWKS; makes no network calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+
+        # stub JWKS: prime the shared store so nothing is fetched
+        jwks_store._keys = {"bench": jwk.construct(public_pem, "RS256")}
+        jwks_store._fetched_at = time.monotonic()
+
+        token = jwt.encode(
+            {
+                "sub": "auth0|benchmark",
+                "aud": AUDIENCE,
+                "iss": f"https://{DOMAIN}/",
+                "exp": int(time.time()) + 3600,
+            },
+            private_pem,
+            algorithm="RS256",
+            headers={"kid": "bench"},
+        )
+        # a DRF Request, as the permission sees it behind an APIView
+        request = APIView().initialize_request(
+            APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        )
+        permission = IsAuthenticatedWithAuth0()
+
+        results = {}
+        for label, cache_size in (("cache off", 0), ("cache on", 10000)):
+            with override_settings(
+                AUTH0_DOMAIN=DOMAIN,
+                AUTH0_AUDIENCE=AUDIENCE,
+                AUTH0_TOKEN_CACHE_SIZE=cache_size,
+            ):
+                verified_tokens.clear()
+                start = time.perf_counter()
+                for _ in range(n):
+                    permission.has_permission(request, None)
+                results[label] = (time.perf_counter() - start) / n
+
+        jwks_store._keys, jwks_store._fetched_at = {}, None
+        verified_tokens.clear()
+
+        for label, per_request in results.items():
+            self.stdout.write(f"{label:>10}: {per_request * 1e6:8.1f} µs/request")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up: {results['cache off'] / results['cache on']:.1f}x over {n} requests"
+        ))
@@ -0,0 +1,65 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from shop.models import Category, Product, ProductImage
+from shop.serializers import ProductSerializer, product_cards, render_cards
+from shop.utils.benchmark import require_debug
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialize the same throwaway products as full ProductSerializer "
+        "output and as ?view=card rows, and print the time each takes "
+        "(best of --repeat). Creates and deletes its own rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--images", type=int, default=2, help="Per product")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        require_debug()
+        slug = f"benchmark-{uuid.uuid4().hex[:8]}"
+        category = Category.objects.create(name="Benchmark", slug=slug)
+
+        try:
+            products = Product.objects.bulk_create([
+                Product(name=f"Benchmark {i}", slug=f"{slug}-{i}", category=category, price=i)
+                for i in range(options["products"])
+            ])
+            if products and products[0].id is None:
+                products = Product.objects.filter(category=category)
+
+            ProductImage.objects.bulk_create([
+                ProductImage(
+                    product=product,
+                    image=f"sample{n}",
+                    urls={"original": f"https://img.invalid/{product.id}/{n}", "card": "c"},
+                )
+                for product in products
+                for n in range(options["images"])
+            ])
+
+            queryset = Product.objects.filter(category=category)
+            full = self._best(options["repeat"], lambda: ProductSerializer(
+                queryset.prefetch_related("images"), many=True
+            ).data)
+            cards = self._best(options["repeat"], lambda: render_cards(product_cards(queryset)))
+        finally:
+            category.delete()
+
+        n = options["products"]
+        self.stdout.write(f"ProductSerializer: {full * 1000:7.1f} ms for {n} products")
+        self.stdout.write(f"     ?view=card : {cards * 1000:7.1f} ms for {n} products")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {full / cards:.1f}x"))
+
+    def _best(self, repeat, serialize):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,55 @@
+import time
+
+import razorpay
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from shop.payments import get_razorpay_client, pool_stats, reset_razorpay_client
+from shop.utils.fake_razorpay import FakeRazorpayServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Create orders against a local fake Razorpay server, once with a "
+        "new razorpay.Client per call (the old behaviour) and once with the "
+        "pooled client, and print latency and pool stats. No network calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=200)
+        parser.add_argument("--delay-ms", type=float, default=0)
+
+    def handle(self, *args, **options):
+        n = options["calls"]
+        server = FakeRazorpayServer(delay=options["delay_ms"] / 1000).start()
+        auth = ("rzp_test_benchmark", "secret")
+
+        try:
+            with override_settings(
+                RAZORPAY_KEY_ID=auth[0],
+                RAZORPAY_KEY_SECRET=auth[1],
+                RAZORPAY_BASE_URL=server.base_url,
+            ):
+                reset_razorpay_client()
+
+                start = time.perf_counter()
+                for _ in range(n):
+                    client = razorpay.Client(auth=auth, base_url=server.base_url)
+                    client.order.create({"amount": 100, "currency": "INR"})
+                fresh = (time.perf_counter() - start) / n
+
+                start = time.perf_counter()
+                for _ in range(n):
+                    get_razorpay_client().order.create({"amount": 100, "currency": "INR"})
+                pooled = (time.perf_counter() - start) / n
+
+                stats = pool_stats()
+                reset_razorpay_client()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(f"client per call: {fresh * 1000:6.2f} ms/call")
+        self.stdout.write(f"  pooled client: {pooled * 1000:6.2f} ms/call")
+        self.stdout.write(f"     pool stats: {stats}")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {fresh / pooled:.1f}x over {n} calls"))
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from shop.models import Order
+from shop.payments import reset_razorpay_client
+from shop.reconciliation import reconcile_payments
+from shop.utils.benchmark import require_debug
+from shop.utils.fake_razorpay import FakeRazorpayServer
+
+USER = "auth0|benchmark-reconcile"
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile throwaway pending orders against a local fake Razorpay "
+        "server (some captured, some not), with one worker and then with "
+        "--workers, and print throughput. No network calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--captured", type=float, default=0.3, help="Fraction paid at Razorpay")
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--delay-ms", type=float, default=20)
+
+    def handle(self, *args, **options):
+        require_debug()
+        server = FakeRazorpayServer(delay=options["delay_ms"] / 1000).start()
+
+        try:
+            with override_settings(
+                RAZORPAY_KEY_ID="rzp_test_benchmark",
+                RAZORPAY_KEY_SECRET="secret",
+                RAZORPAY_BASE_URL=server.base_url,
+                RAZORPAY_POOL_SIZE=max(options["workers"], 1),
+            ):
+                for workers in (1, options["workers"]):
+                    expected = self._create_orders(server, options)
+                    reset_razorpay_client()
+
+                    start = time.perf_counter()
+                    # only this run's orders, never real pending ones
+                    stats = reconcile_payments(
+                        batch_size=options["batch_size"],
+                        workers=workers,
+                        older_than=0,
+                        orders=Order.objects.filter(auth0_user_id=USER),
+                    )
+                    elapsed = time.perf_counter() - start
+
+                    paid = Order.objects.filter(auth0_user_id=USER, status="paid").count()
+                    self.stdout.write(
+                        f"{workers:>3} workers: {stats['checked']} orders in {elapsed:.2f}s "
+                        f"({stats['checked'] / elapsed:.0f} orders/s), "
+                        f"{stats['paid']} marked paid, {stats['errors']} errors"
+                    )
+                    if paid != expected:
+                        self.stderr.write(f"expected {expected} paid orders, found {paid}")
+                    Order.objects.filter(auth0_user_id=USER).delete()
+                reset_razorpay_client()
+        finally:
+            Order.objects.filter(auth0_user_id=USER).delete()
+            server.shutdown()
+            server.server_close()
+
+    def _create_orders(self, server, options):
+        n = options["orders"]
+        captured = int(n * options["captured"])
+        razorpay_ids = [server.add_order(amount=10000) for _ in range(n)]
+        for razorpay_order_id in razorpay_ids[:captured]:
+            server.capture(razorpay_order_id)
+
+        Order.objects.bulk_create([
+            Order(
+                auth0_user_id=USER,
+                total_amount=100,
+                razorpay_order_id=razorpay_order_id,
+            )
+            for razorpay_order_id in razorpay_ids
+        ])
+        return captured
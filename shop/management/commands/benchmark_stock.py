@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, transaction
+
+from shop.models import Category, Product
+from shop.reservations import InsufficientStock, rebalance_shards, take_stock
+from shop.utils.benchmark import require_debug
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent checkouts of one SKU, with and without shard counters. "
+        "Each worker takes 1 unit and holds its transaction open for "
+        "--hold-ms, like a checkout that still has inserts to do. Creates "
+        "and deletes a throwaway product. Needs PostgreSQL: SQLite "
+        "serializes every writer, so sharding can't help there. Checkouts "
+        "that fail with a database error are counted, not sold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--checkouts", type=int, default=50, help="Per worker")
+        parser.add_argument("--shards", type=int, default=8)
+        parser.add_argument("--hold-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        require_debug()
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                f"Needs PostgreSQL (this is {connection.vendor}): other "
+                "databases lock whole tables or files, not rows."
+            )
+
+        workers, checkouts = options["workers"], options["checkouts"]
+        total = workers * checkouts
+
+        category = Category.objects.create(
+            name="Benchmark", slug=f"benchmark-{uuid.uuid4().hex[:8]}"
+        )
+        product = Product.objects.create(
+            name="Benchmark SKU",
+            slug=category.slug,
+            category=category,
+            price=1,
+            stock=total,
+        )
+
+        try:
+            results = {}
+            for shard_count in (0, options["shards"]):
+                Product.objects.filter(id=product.id).update(stock=total, reserved=0)
+                rebalance_shards(product.id, shard_count)
+                results[shard_count] = self._run(
+                    product.id, workers, checkouts, options["hold_ms"] / 1000
+                )
+        finally:
+            category.delete()
+
+        for shard_count, (elapsed, sold, errors) in results.items():
+            label = f"{shard_count} shards" if shard_count else "unsharded"
+            self.stdout.write(
+                f"{label:>10}: {sold} checkouts in {elapsed:.2f}s "
+                f"({sold / elapsed:.0f}/s)"
+            )
+            if errors:
+                self.stderr.write(f"{label:>10}: {errors} checkouts failed with a database error")
+
+        base, sharded = results[0][0], results[options["shards"]][0]
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {base / sharded:.1f}x"))
+
+    def _run(self, product_id, workers, checkouts, hold):
+        sold, failed = [], []
+
+        def worker():
+            done = errors = 0
+            try:
+                for _ in range(checkouts):
+                    try:
+                        with transaction.atomic():
+                            take_stock({product_id: 1})
+                            time.sleep(hold)
+                    except DatabaseError:
+                        errors += 1
+                        continue
+                    done += 1
+            except InsufficientStock:
+                pass
+            finally:
+                sold.append(done)
+                failed.append(errors)
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, sum(sold), sum(failed)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from shop.trending import recompute_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold completed hourly view buckets into time-decayed trending scores "
+        "and re-materialize the top-N ranking. Run hourly (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--half-life", type=float, default=24, help="Half-life in hours")
+        parser.add_argument("--top", type=int, default=50, help="Number of ranked products")
+        parser.add_argument(
+            "--lookback", type=int, default=168,
+            help="Hours of buckets to keep (and to fold on the first run)",
+        )
+
+    def handle(self, *args, **options):
+        result = recompute_trending(
+            half_life_hours=options["half_life"],
+            top=options["top"],
+            lookback_hours=options["lookback"],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Trending computed through {result['computed_through']:%Y-%m-%d %H:00}: "
+            f"{result['products_updated']} products updated, "
+            f"{result['ranked']} ranked"
+            f"{' (ranking changed)' if result['ranking_changed'] else ''}"
+        ))
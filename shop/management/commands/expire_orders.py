@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.order_status import expire_pending_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel orders left pending longer than PENDING_ORDER_TTL and return "
+        "their held stock, in batches. Orders with a Razorpay order are left "
+        "to reconcile_payments. Safe to run alongside checkout. Runs once, "
+        "or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, sweeping every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            cancelled, released = expire_pending_orders(batch_size=options["batch_size"])
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Cancelled {cancelled} orders, released {released} holds "
+                f"in {elapsed:.1f}s"
+            ))
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
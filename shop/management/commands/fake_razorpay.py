@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from shop.utils.fake_razorpay import FakeRazorpayServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Razorpay orders API. Point the app at "
+        "it with RAZORPAY_BASE_URL=http://127.0.0.1:<port> (any key id / "
+        "secret is accepted)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--delay-ms", type=float, default=0,
+            help="Artificial latency added to every response",
+        )
+
+    def handle(self, *args, **options):
+        server = FakeRazorpayServer(
+            options["host"], options["port"], delay=options["delay_ms"] / 1000
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fake Razorpay on {server.base_url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,303 @@
+import asyncio
+import multiprocessing
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import httpx
+import uvicorn
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from jose import jwk, jwt
+
+from shop.models import Address, Category, Order, Product
+from shop.utils.benchmark import require_debug
+from shop.utils.fake_razorpay import FakeRazorpayServer
+from shop.utils.jwks import jwks_store
+from shop.utils.token_cache import verified_tokens
+
+DOMAIN = "loadtest.invalid"
+AUDIENCE = "loadtest-api"
+USER = "auth0|loadtest"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure catalog throughput alone and again while payment calls wait "
+        "on a slow fake Razorpay server, first with the app behind N sync "
+        "workers (WSGI, like gunicorn's default) and then under uvicorn "
+        "(ASGI). The fake server and the load generator run in their own "
+        "processes. Creates and deletes throwaway rows; no network calls "
+        "leave the machine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--catalog-clients", type=int, default=8)
+        parser.add_argument(
+            "--payment-clients", type=int, default=32,
+            help="Payment calls kept in flight during the second run",
+        )
+        parser.add_argument("--razorpay-delay-ms", type=float, default=1000)
+        parser.add_argument(
+            "--wsgi-workers", type=int, default=4,
+            help="Sync workers for the WSGI run",
+        )
+        parser.add_argument("--port", type=int, default=8766)
+
+    def handle(self, *args, **options):
+        require_debug()
+        fork = multiprocessing.get_context("fork")
+        fake = FakeRazorpayServer(delay=options["razorpay_delay_ms"] / 1000)
+        fake_process = fork.Process(target=fake.serve_forever, daemon=True)
+        fake_process.start()
+        token = self._prime_auth()
+
+        with override_settings(
+            AUTH0_DOMAIN=DOMAIN,
+            AUTH0_AUDIENCE=AUDIENCE,
+            RAZORPAY_KEY_ID="rzp_test_loadtest",
+            RAZORPAY_KEY_SECRET="secret",
+            RAZORPAY_BASE_URL=fake.base_url,
+            # one connection per in-flight call: measure the server, not the pool
+            RAZORPAY_POOL_SIZE=max(settings.RAZORPAY_POOL_SIZE, options["payment_clients"]),
+            ALLOWED_HOSTS=["127.0.0.1"],
+        ):
+            category, order_ids = self._create_rows(options)
+            results = {}
+            try:
+                for mode, serve in (("wsgi", self._serve_wsgi), ("asgi", self._serve_asgi)):
+                    stop = serve(options)
+                    try:
+                        base_url = f"http://127.0.0.1:{options['port']}"
+                        calls = order_ids[: len(order_ids) // 2] if mode == "wsgi" else order_ids[len(order_ids) // 2:]
+                        results[mode] = (
+                            self._load(fork, base_url, token, options, []),
+                            self._load(fork, base_url, token, options, calls),
+                        )
+                    finally:
+                        stop()
+            finally:
+                fake_process.terminate()
+                fake.server_close()
+                Order.objects.filter(auth0_user_id=USER).delete()
+                Address.objects.filter(auth0_user_id=USER).delete()
+                category.delete()
+                jwks_store._keys, jwks_store._fetched_at = {}, None
+                verified_tokens.clear()
+
+        labels = {"wsgi": f"WSGI, {options['wsgi_workers']} sync workers", "asgi": "ASGI (uvicorn)"}
+        for mode, (alone, loaded) in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(labels[mode]))
+            self._report("catalog alone", alone)
+            self._report("catalog + payments", loaded)
+            self.stdout.write(
+                f"{'':>20}  catalog throughput while {options['payment_clients']} "
+                f"payment calls wait: {loaded['catalog_rps'] / alone['catalog_rps']:.0%} of baseline"
+            )
+
+    # -------------------------------------------------
+    # SERVERS
+    # -------------------------------------------------
+    def _serve_asgi(self, options):
+        from crochetbackend.asgi import application
+
+        server = uvicorn.Server(uvicorn.Config(
+            application,
+            host="127.0.0.1",
+            port=options["port"],
+            log_level="warning",
+            lifespan="on",
+        ))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+
+        return stop
+
+    def _serve_wsgi(self, options):
+        from crochetbackend.wsgi import application
+
+        server = make_server(
+            "127.0.0.1",
+            options["port"],
+            application,
+            server_class=type(
+                "Server", (_PooledWSGIServer,), {"workers": options["wsgi_workers"]}
+            ),
+            handler_class=_QuietHandler,
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.pool.shutdown()
+            server.server_close()
+
+        return stop
+
+    # -------------------------------------------------
+    # SETUP
+    # -------------------------------------------------
+    def _prime_auth(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        jwks_store._keys = {"loadtest": jwk.construct(public_pem, "RS256")}
+        jwks_store._fetched_at = time.monotonic()
+
+        return jwt.encode(
+            {
+                "sub": USER,
+                "aud": AUDIENCE,
+                "iss": f"https://{DOMAIN}/",
+                "exp": int(time.time()) + 3600,
+            },
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ),
+            algorithm="RS256",
+            headers={"kid": "loadtest"},
+        )
+
+    def _create_rows(self, options):
+        slug = f"loadtest-{uuid.uuid4().hex[:8]}"
+        category = Category.objects.create(name="Load test", slug=slug)
+        Product.objects.bulk_create([
+            Product(name=f"Load test {i}", slug=f"{slug}-{i}", category=category, price=100)
+            for i in range(50)
+        ])
+
+        address = Address.objects.create(
+            auth0_user_id=USER, name="Load test", phone="0",
+            street="-", city="-", pincode="0",
+        )
+        # enough orders that every payment call (both runs) creates a new
+        # Razorpay order
+        calls = 2 * (int(
+            options["payment_clients"] * options["seconds"]
+            / (options["razorpay_delay_ms"] / 1000 or 0.01)
+        ) + options["payment_clients"])
+        orders = Order.objects.bulk_create([
+            Order(auth0_user_id=USER, address=address, total_amount=100)
+            for _ in range(calls)
+        ])
+        if orders[0].id is None:
+            orders = Order.objects.filter(auth0_user_id=USER)
+        return category, [order.id for order in orders]
+
+    # -------------------------------------------------
+    # LOAD
+    # -------------------------------------------------
+    def _load(self, fork, base_url, token, options, order_ids):
+        results = fork.Queue()
+        process = fork.Process(
+            target=lambda: results.put(
+                asyncio.run(self._run(base_url, token, options, order_ids))
+            ),
+        )
+        process.start()
+        result = results.get()
+        process.join()
+        return result
+
+    async def _run(self, base_url, token, options, order_ids):
+        deadline = time.monotonic() + options["seconds"]
+        catalog, payments = [], []
+        queue = list(order_ids)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def browse(client):
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = await client.get("/api/products/")
+                response.raise_for_status()
+                catalog.append(time.perf_counter() - start)
+
+        async def pay(client):
+            while time.monotonic() < deadline and queue:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/payments/razorpay/create/",
+                    json={"order_id": queue.pop()},
+                    headers=headers,
+                )
+                response.raise_for_status()
+                payments.append(time.perf_counter() - start)
+
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *[browse(client) for _ in range(options["catalog_clients"])],
+                *[pay(client) for _ in range(options["payment_clients"] if order_ids else 0)],
+            )
+            elapsed = time.perf_counter() - started
+
+        return {
+            "catalog_rps": len(catalog) / elapsed,
+            "catalog_p95": _p95(catalog),
+            "payments": len(payments),
+            "payment_p50": statistics.median(payments) if payments else 0,
+        }
+
+    def _report(self, label, result):
+        line = (
+            f"{label:>20}: {result['catalog_rps']:7.1f} catalog req/s, "
+            f"p95 {result['catalog_p95'] * 1000:6.1f} ms"
+        )
+        if result["payments"]:
+            line += (
+                f" | {result['payments']} payments, "
+                f"p50 {result['payment_p50'] * 1000:.0f} ms"
+            )
+        self.stdout.write(line)
+
+
+class _PooledWSGIServer(WSGIServer):
+    """wsgiref serving from `workers` threads: N sync gunicorn workers."""
+
+    workers = 4
+    request_queue_size = 256
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(self.workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _p95(samples):
+    if len(samples) < 2:
+        return samples[0] if samples else 0
+    return statistics.quantiles(samples, n=20)[-1]
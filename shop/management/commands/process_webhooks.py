@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from shop.webhooks import process_webhook_events, prune_processed_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply queued Razorpay webhook events in batches. Several workers "
+        "can run at once (rows are claimed with SKIP LOCKED). Failed events "
+        "are retried with exponential backoff. Runs until no event is due, "
+        "or forever with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, polling every N seconds when idle",
+        )
+        parser.add_argument(
+            "--keep-days", type=int, default=7,
+            help="Delete processed events older than this (dedupe window)",
+        )
+
+    def handle(self, *args, **options):
+        pruned = prune_processed_events(options["keep_days"])
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} processed events")
+
+        while True:
+            processed = 0
+            while claimed := process_webhook_events(batch_size=options["batch_size"]):
+                processed += claimed
+
+            if processed or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} events"))
+
+            if not options["interval"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
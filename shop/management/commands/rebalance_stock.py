@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.models import Product
+from shop.reservations import rebalance_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Spread a hot product's free stock over N shard counters so "
+        "concurrent checkouts don't queue on one row. --shards 0 folds "
+        "everything back onto the product. Re-run after restocking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("product", help="Product id or slug")
+        parser.add_argument("--shards", type=int, required=True)
+
+    def handle(self, *args, **options):
+        if options["shards"] < 0:
+            raise CommandError("--shards must be >= 0")
+
+        lookup = options["product"]
+        product = Product.objects.filter(
+            **({"id": lookup} if lookup.isdigit() else {"slug": lookup})
+        ).first()
+        if not product:
+            raise CommandError(f"Product {lookup!r} not found")
+
+        pool = rebalance_shards(product.id, options["shards"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{product.name}: {pool} free units over {options['shards']} shards"
+        ))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.reconciliation import reconcile_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Ask Razorpay about every pending order that has a Razorpay order "
+        "and mark the captured ones paid (for webhooks that never arrived). "
+        "Uncaptured ones older than PENDING_ORDER_TTL are cancelled. "
+        "Fetches run --workers at a time over the pooled client; each page "
+        "of results is applied in one batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Concurrent Razorpay calls (default RAZORPAY_POOL_SIZE)",
+        )
+        parser.add_argument(
+            "--older-than", type=float, default=300,
+            help="Skip orders younger than N seconds; their webhook may still come",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            stats = reconcile_payments(
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                older_than=options["older_than"],
+            )
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Checked {stats['checked']} orders in {elapsed:.1f}s "
+            f"({stats['checked'] / elapsed:.0f} orders/s), "
+            f"{stats['captured']} captured at Razorpay, {stats['errors']} errors"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {stats['paid']} orders paid, cancelled {stats['cancelled']} unpaid"
+        ))
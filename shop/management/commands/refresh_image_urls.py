@@ -0,0 +1,46 @@
+import cloudinary
+from django.core.management.base import BaseCommand
+
+from shop.cache import bump_catalog_version
+from shop.images import image_urls
+from shop.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Store precomputed Cloudinary delivery URLs on ProductImage rows. "
+        "By default only rows without URLs; --all rebuilds every row "
+        "(e.g. after changing IMAGE_VARIANTS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild every row")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not cloudinary.config().cloud_name:
+            self.stdout.write(self.style.WARNING("Cloudinary not configured; skipping"))
+            return
+
+        images = ProductImage.objects.only("id", "image").order_by("id")
+        if not options["all"]:
+            images = images.filter(urls={})
+
+        batch, updated = [], 0
+        for image in images.iterator(chunk_size=options["batch_size"]):
+            image.urls = image_urls(image.image)
+            batch.append(image)
+
+            if len(batch) >= options["batch_size"]:
+                ProductImage.objects.bulk_update(batch, ["urls"])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            ProductImage.objects.bulk_update(batch, ["urls"])
+            updated += len(batch)
+
+        if updated:
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Stored URLs for {updated} images"))
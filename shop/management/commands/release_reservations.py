@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.reservations import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Return expired checkout stock holds to available stock, in batches. "
+        "Runs once, or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, sweeping every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_reservations(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds"))
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+# Full-text index over Product.name (weight A) and description (weight B).
+# - PostgreSQL: generated tsvector column + GIN index (always in sync)
+# - SQLite: FTS5 table keyed by product id, kept in sync by shop/signals.py
+#   (not by triggers: SQLite table rebuilds in later migrations drop them)
+
+PG_FORWARD = [
+    """
+    ALTER TABLE shop_product ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX shop_product_search_idx ON shop_product USING GIN (search_vector)",
+]
+PG_REVERSE = [
+    "DROP INDEX IF EXISTS shop_product_search_idx",
+    "ALTER TABLE shop_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE shop_product_fts USING fts5(name, description)",
+    """
+    INSERT INTO shop_product_fts (rowid, name, description)
+    SELECT id, name, description FROM shop_product
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS shop_product_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0013_trending'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": PG_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": PG_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:34
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_product_counts(apps, schema_editor):
+    Category = apps.get_model('shop', 'Category')
+    for category in Category.objects.annotate(n=Count('products')):
+        Category.objects.filter(pk=category.pk).update(product_count=category.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0014_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='product_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price', 'id'], name='product_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-view_count', '-id'], name='product_cat_popular_idx'),
+        ),
+        migrations.RunPython(backfill_product_counts, migrations.RunPython.noop),
+    ]
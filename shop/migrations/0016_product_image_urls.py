@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0015_category_listing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='urls',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:39
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def hold_pending_orders(apps, schema_editor):
+    """
+    Pending orders placed before reservations took their stock straight
+    off Product.stock. Turn that into a hold: put the units back on stock
+    and count them as reserved, so payment commits them exactly once and
+    an unpaid order gives them back when the hold expires.
+    """
+    OrderItem = apps.get_model('shop', 'OrderItem')
+    Product = apps.get_model('shop', 'Product')
+    StockReservation = apps.get_model('shop', 'StockReservation')
+
+    expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    quantities = defaultdict(int)
+    holds = []
+
+    items = OrderItem.objects.filter(
+        order__status='pending', product__isnull=False
+    ).values_list('order_id', 'product_id', 'quantity')
+    for order_id, product_id, quantity in items.iterator(chunk_size=2000):
+        quantities[product_id] += quantity
+        holds.append(StockReservation(
+            order_id=order_id, product_id=product_id, quantity=quantity, expires_at=expires_at
+        ))
+        if len(holds) >= 1000:
+            StockReservation.objects.bulk_create(holds)
+            holds = []
+    StockReservation.objects.bulk_create(holds)
+
+    for product_id, quantity in quantities.items():
+        Product.objects.filter(pk=product_id).update(
+            stock=F('stock') + quantity, reserved=F('reserved') + quantity
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0016_product_image_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='shop.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='shop.product')),
+            ],
+        ),
+        migrations.RunPython(hold_pending_orders, migrations.RunPython.noop),
+    ]
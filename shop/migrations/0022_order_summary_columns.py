@@ -0,0 +1,69 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:59
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from shop.images import image_url
+
+BATCH_SIZE = 1000
+
+
+def backfill_order_summaries(apps, schema_editor):
+    Order = apps.get_model('shop', 'Order')
+    OrderItem = apps.get_model('shop', 'OrderItem')
+    ProductImage = apps.get_model('shop', 'ProductImage')
+
+    # item_count: one UPDATE with a correlated SUM
+    quantities = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    Order.objects.update(item_count=Coalesce(Subquery(quantities), 0))
+
+    # preview_image: first image of the first item's product, read and
+    # written back in bounded batches
+    first_product = OrderItem.objects.filter(
+        order=OuterRef('pk'), product__isnull=False
+    ).order_by('id').values('product_id')[:1]
+    # (build.sh runs refresh_image_urls after migrate, so `urls` may still
+    # be empty here: image_url() falls back to building from `image`)
+    first_image = ProductImage.objects.filter(
+        product_id=OuterRef('first_product_id')
+    ).order_by('id')
+    orders = Order.objects.annotate(
+        first_product_id=Subquery(first_product)
+    ).annotate(
+        first_image_urls=Subquery(first_image.values('urls')[:1]),
+        first_image_file=Subquery(first_image.values('image')[:1]),
+    ).filter(first_image_file__isnull=False).values_list(
+        'id', 'first_image_urls', 'first_image_file'
+    )
+
+    batch = []
+    for order_id, urls, image in orders.iterator(chunk_size=BATCH_SIZE):
+        if thumbnail := image_url(urls, image, 'thumbnail'):
+            batch.append(Order(pk=order_id, preview_image=thumbnail))
+        if len(batch) >= BATCH_SIZE:
+            Order.objects.bulk_update(batch, ['preview_image'])
+            batch = []
+    Order.objects.bulk_update(batch, ['preview_image'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_order_expiry_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='preview_image',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.RunPython(backfill_order_summaries, migrations.RunPython.noop),
+    ]
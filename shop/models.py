@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
+from .images import image_urls
+
 
 # ─────────────────────────────
 # CATEGORY
@@ -9,6 +13,9 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True, db_index=True)
 
+    # maintained by shop/signals.py (facet counts without COUNT(*))
+    product_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["name"]
         verbose_name_plural = "Categories"
@@ -20,6 +27,23 @@ class Category(models.Model):
 # ─────────────────────────────
 # PRODUCT
 # ─────────────────────────────
+class ProductQuerySet(models.QuerySet):
+    def with_available_stock(self):
+        """
+        Annotate `free_stock` (row stock - reserved + shard stock) in the
+        same query, so listing sharded products costs no query per row.
+        """
+        shard_stock = ProductStockShard.objects.filter(
+            product=models.OuterRef("pk")
+        ).values("product").annotate(total=models.Sum("stock")).values("total")
+
+        return self.annotate(free_stock=models.ExpressionWrapper(
+            models.F("stock") - models.F("reserved")
+            + Coalesce(models.Subquery(shard_stock), 0),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, db_index=True)
@@ -33,17 +57,68 @@ class Product(models.Model):
 
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0, db_index=True)
+    # units held by unexpired checkout reservations (see shop/reservations.py)
+    reserved = models.PositiveIntegerField(default=0)
+    # >0 for hot products: most stock lives in ProductStockShard rows
+    shard_count = models.PositiveSmallIntegerField(default=0)
     description = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     view_count = models.PositiveIntegerField(default=0)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination: ORDER BY created_at DESC, id DESC
+            models.Index(fields=["-created_at", "-id"], name="product_created_id_idx"),
+            # category listing: WHERE category_id = X ORDER BY <sort>, id
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="product_cat_created_idx",
+            ),
+            models.Index(fields=["category", "price", "id"], name="product_cat_price_idx"),
+            models.Index(
+                fields=["category", "-view_count", "-id"],
+                name="product_cat_popular_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def available_stock(self):
+        if "free_stock" in self.__dict__:
+            return self.free_stock
+
+        available = self.stock - self.reserved
+        if self.shard_count:
+            available += self.stock_shards.aggregate(
+                total=models.Sum("stock")
+            )["total"] or 0
+        return available
+
+
+# ─────────────────────────────
+# PRODUCT STOCK SHARD (HOT SKUs)
+# ─────────────────────────────
+class ProductStockShard(models.Model):
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_shards"
+    )
+    index = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("product", "index")
+
+    def __str__(self):
+        return f"{self.product_id}[{self.index}] = {self.stock}"
+
 
 # ─────────────────────────────
 # PRODUCT IMAGE
@@ -57,10 +132,68 @@ class ProductImage(models.Model):
     )
     image = CloudinaryField("image")
 
+    # precomputed delivery URLs, see shop/images.py
+    urls = models.JSONField(default=dict, blank=True)
+
+    def save(self, *args, **kwargs):
+        # upload now (CloudinaryField otherwise does it in pre_save) so the
+        # URLs are known and stored in the same write
+        field = self._meta.get_field("image")
+        field.pre_save(self, self._state.adding)
+        self.urls = image_urls(field.to_python(self.image))
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "image" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "urls"}
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"ProductImage ({self.product.id})"
 
 
+# ─────────────────────────────
+# PRODUCT VIEWS (HOURLY ROLLUP)
+# ─────────────────────────────
+class ProductViewBucket(models.Model):
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="view_buckets"
+    )
+    hour = models.DateTimeField(db_index=True)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("product", "hour")
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.hour:%Y-%m-%d %H:00} = {self.views}"
+
+
+# ─────────────────────────────
+# TRENDING (MATERIALIZED RANKING)
+# ─────────────────────────────
+class TrendingScore(models.Model):
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending"
+    )
+
+    # time-decayed views, as of `computed_through`
+    score = models.FloatField(default=0)
+    rank = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    computed_through = models.DateTimeField()
+
+    class Meta:
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"#{self.rank} {self.product_id} ({self.score:.2f})"
+
+
 # ─────────────────────────────
 # ADDRESS
 # ─────────────────────────────
@@ -123,6 +256,14 @@ class Order(models.Model):
         ("cancelled", "Cancelled"),
     ]
 
+    # status → the statuses it may be entered from (see shop/order_status.py)
+    TRANSITIONS = {
+        "paid": ("pending",),
+        "shipped": ("paid",),
+        "delivered": ("shipped",),
+        "cancelled": ("pending",),
+    }
+
     PAYMENT_METHOD_CHOICES = [
         ("razorpay", "Razorpay"),
         ("cod", "Cash on Delivery"),
@@ -156,10 +297,23 @@ class Order(models.Model):
         db_index=True
     )
 
+    # set at placement so order history reads no items or images
+    item_count = models.PositiveIntegerField(default=0)
+    preview_image = models.URLField(max_length=500, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # order history: WHERE auth0_user_id = X ORDER BY created_at DESC, id DESC
+            models.Index(
+                fields=["auth0_user_id", "-created_at", "-id"],
+                name="order_user_created_id_idx",
+            ),
+            # expiry sweep: WHERE status = 'pending' AND created_at < X
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
@@ -187,3 +341,118 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name if self.product else 'Deleted'} × {self.quantity}"
+
+
+# ─────────────────────────────
+# ARCHIVED ORDER
+# ─────────────────────────────
+class ArchivedOrder(models.Model):
+    # the Order's id, kept so links and history cursors stay valid
+    id = models.BigIntegerField(primary_key=True)
+    auth0_user_id = models.CharField(max_length=255)
+
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = models.CharField(max_length=20)
+    razorpay_order_id = models.CharField(max_length=100, null=True, blank=True)
+    razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    item_count = models.PositiveIntegerField(default=0)
+    preview_image = models.URLField(max_length=500, blank=True)
+
+    # snapshots: [{"product_id", "name", "price", "quantity"}, ...] and
+    # the address fields as they were
+    items = models.JSONField(default=list)
+    address = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["auth0_user_id", "-created_at", "-id"],
+                name="archived_user_created_id_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id} - {self.status}"
+
+
+# ─────────────────────────────
+# STOCK RESERVATION
+# ─────────────────────────────
+class StockReservation(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="reservations"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservations"
+    )
+    # set when the units were taken from a ProductStockShard
+    shard = models.PositiveSmallIntegerField(null=True, blank=True)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Order #{self.order_id} holds {self.quantity} × {self.product_id}"
+
+
+# ─────────────────────────────
+# IDEMPOTENCY KEY
+# ─────────────────────────────
+class IdempotencyKey(models.Model):
+    auth0_user_id = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    # sha256 of the request body: a reused key with another body is refused
+    request_hash = models.CharField(max_length=64)
+
+    # null while the first request is still running
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("auth0_user_id", "endpoint", "key")
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.status_code or 'in progress'})"
+
+
+# ─────────────────────────────
+# WEBHOOK INBOX
+# ─────────────────────────────
+class WebhookEvent(models.Model):
+    # X-Razorpay-Event-Id (sha256 of the body if absent): retries dedupe on insert
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=100)
+    payload = models.JSONField()
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # pushed back exponentially after each failure (shop/webhooks.py)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # worker scan: WHERE processed_at IS NULL AND next_attempt_at <= now
+            # ORDER BY next_attempt_at, id
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(processed_at__isnull=True),
+                name="webhook_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.event_id}"
@@ -0,0 +1,167 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+
+from .models import Order, StockReservation
+from .reservations import commit_reservations, release_holds
+
+logger = logging.getLogger(__name__)
+
+
+# =================================================
+# 🔀 ORDER STATUS TRANSITIONS
+# =================================================
+# Every status change is one conditional UPDATE:
+#   UPDATE shop_order SET status = <to>, ... WHERE ... AND status IN (<from>)
+# The database decides which of several concurrent writers wins; the row
+# count tells each caller whether it was them. Losers (duplicate webhook
+# deliveries, a verify racing the webhook) write nothing.
+
+
+# statuses an order only reaches by being paid
+PAID_STATUSES = ("paid", "shipped", "delivered")
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def transition(queryset, to, **fields):
+    """
+    Move every order in `queryset` that is allowed to enter `to`
+    (Order.TRANSITIONS) into it, setting `fields` alongside.
+    Returns how many orders this call moved.
+    """
+    if to not in Order.TRANSITIONS:
+        raise InvalidTransition(f"No transition into {to!r}")
+
+    return queryset.filter(status__in=Order.TRANSITIONS[to]).update(status=to, **fields)
+
+
+@transaction.atomic
+def mark_paid(razorpay_order_id, **fields):
+    """
+    pending → paid for the order behind a Razorpay order; only the caller
+    that wins the transition commits its stock reservations. Returns
+    whether this call did it.
+    """
+    orders = Order.objects.filter(razorpay_order_id=razorpay_order_id)
+    if not transition(orders, "paid", **fields):
+        return False
+
+    commit_reservations([orders.values_list("id", flat=True).get()])
+    return True
+
+
+def check_lost_payment(razorpay_order_id, razorpay_payment_id):
+    """
+    After a mark_paid that lost: the order's current status, or None if
+    there is no such order. A captured payment on an order that is not
+    paid (e.g. cancelled by expiry) is logged, to be refunded by hand.
+    """
+    status = Order.objects.filter(
+        razorpay_order_id=razorpay_order_id
+    ).values_list("status", flat=True).first()
+    if status is not None and status not in PAID_STATUSES:
+        logger.error(
+            "Payment %s captured for %s order (Razorpay %s): refund it by hand",
+            razorpay_payment_id, status, razorpay_order_id,
+        )
+    return status
+
+
+@transaction.atomic
+def mark_many_paid(payment_ids):
+    """
+    mark_paid for a batch: `payment_ids` maps Razorpay order id → captured
+    payment id. One UPDATE moves every order still pending, and the
+    winners' reservations are committed together. Returns the number of
+    orders this call moved.
+    """
+    if not payment_ids:
+        return 0
+
+    won = list(
+        Order.objects.select_for_update()
+        .filter(razorpay_order_id__in=payment_ids, status__in=Order.TRANSITIONS["paid"])
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not won:
+        return 0
+
+    moved = transition(
+        Order.objects.filter(id__in=won),
+        "paid",
+        razorpay_payment_id=Case(
+            *[
+                When(razorpay_order_id=order_id, then=Value(payment_id))
+                for order_id, payment_id in payment_ids.items()
+            ],
+            output_field=CharField(),
+        ),
+    )
+    commit_reservations(won)
+    return moved
+
+
+@transaction.atomic
+def cancel_pending(ids):
+    """
+    pending → cancelled for the orders in `ids` and give their held stock
+    back. Orders paid meanwhile fail the transition and keep their stock.
+    Returns (orders cancelled, holds released).
+    """
+    count = transition(Order.objects.filter(id__in=ids), "cancelled")
+    if not count:
+        return 0, 0
+
+    # holds the reservation sweeper has locked are its to release
+    holds = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(order_id__in=Order.objects.filter(id__in=ids, status="cancelled"))
+        .order_by("id")
+        .values_list("id", "product_id", "shard", "quantity")
+    )
+    if holds:
+        release_holds(holds)
+    return count, len(holds)
+
+
+def expire_pending_orders(batch_size=1000, now=None):
+    """
+    Cancel orders still pending PENDING_ORDER_TTL after placement and give
+    their held stock back. Per batch: one locked SELECT of order ids off
+    the (status, created_at) index, one conditional UPDATE to cancelled,
+    then one CASE UPDATE per table for every product/shard involved.
+    Rows locked by a checkout or payment in flight are skipped, and an
+    order paid meanwhile fails the transition and keeps its stock.
+
+    Orders with a Razorpay order may have been paid with the webhook
+    lost: they are left to reconcile_payments, which asks Razorpay first.
+    Returns (orders cancelled, holds released).
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.PENDING_ORDER_TTL)
+    cancelled = released = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(status="pending", razorpay_order_id__isnull=True, created_at__lt=cutoff)
+                .order_by("created_at", "id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            count, holds = cancel_pending(ids)
+
+        cancelled += count
+        released += holds
+
+    return cancelled, released
@@ -0,0 +1,69 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+# =================================================
+# 📄 KEYSET (CURSOR) PAGINATION
+# =================================================
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first.
+    - Cursor is opaque (base64) and stable while rows are inserted
+    - Every page is a `WHERE created_at < X ORDER BY ... LIMIT n`,
+      so deep pages cost the same as page one
+    - `id` breaks ties between rows sharing a timestamp
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class SortableCursorPagination(CreatedAtCursorPagination):
+    """
+    Same keyset pagination, ordered by whatever `view.get_ordering()`
+    picks for this request (e.g. ?sort=price). The ordering must end in a
+    unique column and be backed by an index.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ordering()
+
+
+class MergedRows:
+    """
+    Several `.values()` querysets paged as one by CursorPagination (e.g.
+    live orders + archived orders). Filters and ordering go to every
+    queryset; a slice [a:b] reads at most b rows from each and merges
+    them, so a page still costs one indexed LIMIT query per table. Rows
+    must not repeat across querysets, and the ordering fields must all
+    run the same direction and be included in the values.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self.ordering = ()
+
+    def _clone(self, querysets, ordering=None):
+        clone = MergedRows(*querysets)
+        clone.ordering = self.ordering if ordering is None else ordering
+        return clone
+
+    def order_by(self, *ordering):
+        return self._clone([qs.order_by(*ordering) for qs in self.querysets], ordering)
+
+    def filter(self, *args, **kwargs):
+        return self._clone([qs.filter(*args, **kwargs) for qs in self.querysets])
+
+    def __getitem__(self, index):
+        assert isinstance(index, slice) and not index.step, "Only [a:b] slices are supported"
+        stop = index.stop
+
+        fields = [field.lstrip("-") for field in self.ordering]
+        rows = [row for qs in self.querysets for row in (qs[:stop] if stop is not None else qs)]
+        rows.sort(
+            key=lambda row: tuple(row[field] for field in fields),
+            reverse=bool(self.ordering) and self.ordering[0].startswith("-"),
+        )
+        return rows[index]
@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import weakref
+from collections import Counter
+
+import httpx
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from razorpay.errors import BadRequestError, GatewayError, ServerError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# =================================================
+# 💳 POOLED RAZORPAY CLIENT
+# =================================================
+# One razorpay.Client per process, on a requests.Session whose adapter
+# keeps up to RAZORPAY_POOL_SIZE keep-alive connections open, so payment
+# calls skip the TCP + TLS handshake. Every call gets connect/read
+# timeouts. Retries are limited to what is safe to repeat: connection
+# failures (nothing was sent) for any method, 429/5xx and read errors
+# only for GET; order creation is never sent twice.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TimeoutSession(requests.Session):
+    """Session with default timeouts and call counters."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+        self._count("requests")
+        return response
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+
+class PooledRazorpayClient(razorpay.Client):
+    # the stock client looks its own version up via pkg_resources on every
+    # request to build the User-Agent; once per process is enough
+    _version = None
+
+    def _get_version(self):
+        if PooledRazorpayClient._version is None:
+            PooledRazorpayClient._version = super()._get_version()
+        return PooledRazorpayClient._version
+
+
+def build_session():
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.RAZORPAY_POOL_SIZE,
+        max_retries=Retry(
+            total=settings.RAZORPAY_MAX_RETRIES,
+            connect=settings.RAZORPAY_MAX_RETRIES,
+            read=settings.RAZORPAY_MAX_RETRIES,
+            status=settings.RAZORPAY_MAX_RETRIES,
+            allowed_methods=frozenset({"GET"}),
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=0.2,
+            raise_on_status=False,
+        ),
+    )
+    session = TimeoutSession(
+        (settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def get_razorpay_client():
+    """The process-wide client, or None when Razorpay isn't configured."""
+    global _client, _client_pid
+
+    if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
+        return None
+
+    # sockets must not be shared with a parent process after fork
+    if _client_pid != os.getpid():
+        with _lock:
+            if _client_pid != os.getpid():
+                _client = PooledRazorpayClient(
+                    session=build_session(),
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    base_url=settings.RAZORPAY_BASE_URL,
+                )
+                _client_pid = os.getpid()
+
+    return _client
+
+
+def reset_razorpay_client():
+    """Drop the pooled client (after settings change, or in tools)."""
+    global _client, _client_pid
+
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.session.close()
+        _client, _client_pid = None, None
+
+
+def pool_stats():
+    """Connection-pool usage of this process's client."""
+    if _client is None or _client_pid != os.getpid():
+        return {"active": False}
+
+    session = _client.session
+    pools = [
+        pool
+        for adapter in {id(a): a for a in session.adapters.values()}.values()
+        for pool in adapter.poolmanager.pools._container.values()
+    ]
+    return {
+        "active": True,
+        "requests": session.stats["requests"],
+        "errors": session.stats["errors"],
+        "pool_size": settings.RAZORPAY_POOL_SIZE,
+        "connections_opened": sum(pool.num_connections for pool in pools),
+        "idle_connections": sum(
+            sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            for pool in pools
+        ),
+    }
+
+
+def verify_payment_signature(razorpay_order_id, razorpay_payment_id, signature):
+    """Checkout signature check (what razorpay.Utility does), no client needed."""
+    expected = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+# =================================================
+# ⚡ ASYNC RAZORPAY CLIENT (ASGI)
+# =================================================
+# Same pooling and timeouts on httpx, for the async payment views: while
+# a call to Razorpay is in flight the event loop keeps serving other
+# requests instead of a worker sitting blocked on the socket. httpx
+# transport retries only cover connection failures, so nothing that
+# reached Razorpay is ever sent twice.
+
+class AsyncRazorpayClient:
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=settings.RAZORPAY_POOL_SIZE,
+            max_keepalive_connections=settings.RAZORPAY_POOL_SIZE,
+        )
+        self.http = httpx.AsyncClient(
+            base_url=f"{settings.RAZORPAY_BASE_URL}/v1",
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+            timeout=httpx.Timeout(
+                settings.RAZORPAY_READ_TIMEOUT,
+                connect=settings.RAZORPAY_CONNECT_TIMEOUT,
+            ),
+            transport=httpx.AsyncHTTPTransport(
+                limits=limits, retries=settings.RAZORPAY_MAX_RETRIES
+            ),
+        )
+        self.stats = Counter()
+
+    async def _request(self, method, path, **kwargs):
+        try:
+            response = await self.http.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+        self.stats["requests"] += 1
+
+        if response.is_success:
+            return response.json()
+
+        # raise what razorpay.Client raises, so callers handle both alike
+        error = response.json().get("error", {}) if response.content else {}
+        description = error.get("description", "")
+        if response.is_client_error:
+            raise BadRequestError(description)
+        raise ServerError(description)
+
+    async def create_order(self, data):
+        return await self._request("POST", "/orders", json=data)
+
+    async def fetch_order(self, order_id):
+        return await self._request("GET", f"/orders/{order_id}")
+
+    async def fetch_order_payments(self, order_id):
+        return await self._request("GET", f"/orders/{order_id}/payments")
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+class ThreadedRazorpayClient:
+    """
+    AsyncRazorpayClient's interface over the process-wide pooled client,
+    each call run in a worker thread.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def _call(self, method, *args):
+        return await sync_to_async(method, thread_sensitive=False)(*args)
+
+    async def create_order(self, data):
+        return await self._call(self.client.order.create, data)
+
+    async def fetch_order(self, order_id):
+        return await self._call(self.client.order.fetch, order_id)
+
+    async def fetch_order_payments(self, order_id):
+        return await self._call(self.client.order.payments, order_id)
+
+
+# what either client raises when Razorpay can't be reached or rejects a
+# call (the razorpay package's errors for a non-2xx answer)
+RAZORPAY_ERRORS = (
+    httpx.HTTPError, requests.RequestException, BadRequestError, GatewayError, ServerError
+)
+
+# httpx connections belong to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_razorpay_client(request):
+    """
+    The client for an async view, or None when Razorpay isn't configured.
+    Under ASGI it is this event loop's httpx client. Under WSGI each
+    request runs on a throwaway loop, so a per-loop client would be a
+    per-request one: use the pooled sync client from a thread instead.
+    """
+    if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
+        return None
+
+    if not isinstance(request, ASGIRequest):
+        return ThreadedRazorpayClient(get_razorpay_client())
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncRazorpayClient()
+    return client
+
+
+async def close_async_razorpay_client():
+    """Close this event loop's client (ASGI lifespan shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def async_pool_stats():
+    """Pool usage of the async clients of this process (one per loop)."""
+    connections = [
+        conn
+        for client in list(_async_clients.values())
+        for conn in client.http._transport._pool.connections
+    ]
+    return {
+        "clients": len(_async_clients),
+        "requests": sum(c.stats["requests"] for c in list(_async_clients.values())),
+        "errors": sum(c.stats["errors"] for c in list(_async_clients.values())),
+        "pool_size": settings.RAZORPAY_POOL_SIZE,
+        "open_connections": len(connections),
+        "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+    }
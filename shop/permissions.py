@@ -1,11 +1,10 @@
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
-import requests
-from jose import jwt, jwk
+from jose import jwt
 
-# 🔐 Cache JWKS to avoid repeated network calls (Render-safe)
-_JWKS_CACHE = None
+from .utils.jwks import get_signing_key
+from .utils.token_cache import verified_tokens
 
 
 class IsAuthenticatedWithAuth0(BasePermission):
@@ -24,46 +23,41 @@ class IsAuthenticatedWithAuth0(BasePermission):
 
         token = auth_header.split(" ")[1]
 
+        # ⚡ Same token verified before and not yet expired
+        payload = verified_tokens.get(token)
+        if payload is not None:
+            request.auth0_user_id = payload["sub"]
+            return True
+
         try:
             # 1️⃣ Read token header (no verification yet)
             unverified_header = jwt.get_unverified_header(token)
-            kid = unverified_header.get("kid")
 
-            if not kid:
+            if not unverified_header.get("kid"):
                 raise AuthenticationFailed("Invalid token header")
 
-            # 2️⃣ Fetch & cache JWKS
-            global _JWKS_CACHE
-            if _JWKS_CACHE is None:
-                _JWKS_CACHE = requests.get(
-                    f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json",
-                    timeout=5
-                ).json()
-
-            # 3️⃣ Find matching public key
-            public_key = None
-            for key in _JWKS_CACHE.get("keys", []):
-                if key.get("kid") == kid:
-                    public_key = jwk.construct(key)
-                    break
+            # 2️⃣ Parsed public key from the shared JWKS store
+            #    (TTL + refresh on unknown kid, see shop/utils/jwks.py)
+            public_key = get_signing_key(unverified_header)
 
             if public_key is None:
                 raise AuthenticationFailed("Public key not found")
 
-            # 4️⃣ Verify & decode token
+            # 3️⃣ Verify & decode token
             payload = jwt.decode(
                 token,
-                public_key.to_pem().decode("utf-8"),
+                public_key,
                 algorithms=["RS256"],
                 audience=settings.AUTH0_AUDIENCE,
                 issuer=f"https://{settings.AUTH0_DOMAIN}/",
             )
 
-            # 5️⃣ Attach stable Auth0 user id
+            # 4️⃣ Attach stable Auth0 user id
             auth0_user_id = payload.get("sub")
             if not auth0_user_id:
                 raise AuthenticationFailed("auth0_user_id missing in token")
 
+            verified_tokens.set(token, payload)
             request.auth0_user_id = auth0_user_id
             return True
 
@@ -0,0 +1,407 @@
+import logging
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import OrderItem, Product, ProductStockShard, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+# =================================================
+# ⏳ TIME-BOXED STOCK RESERVATIONS
+# =================================================
+# Checkout holds stock instead of decrementing it:
+#   reserve  → Product.reserved += q, one StockReservation per line (TTL)
+#   commit   → paid: stock -= q, reserved -= q, holds deleted
+#   release  → expired: reserved -= q, holds deleted (sweeper)
+# Available stock is always `stock - reserved`: no scan over holds.
+#
+# Hot products (shard_count > 0) keep most of their stock in N
+# ProductStockShard rows. Checkout takes units from a random shard with a
+# conditional UPDATE, never touching the product row, so concurrent
+# checkouts of one SKU spread over N row locks instead of queuing on one.
+# Those holds remember their shard: release puts the units back there
+# (or on the product row, if a rebalance has since dropped that shard),
+# commit just drops the hold.
+#
+# Lock order, everywhere: shard rows (by product id, index) before
+# product rows (by id). Checkout takes shards first so hot products never
+# queue on their product row; release and rebalance follow suit, so none
+# of these paths can deadlock against each other.
+#
+# Stock changes don't invalidate the catalog cache, or every checkout
+# would throw away every cached page: the version is only bumped when a
+# product goes in or out of stock. Cached stock figures may lag by up to
+# CATALOG_CACHE_TIMEOUT meanwhile; checkout always checks the live rows.
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def _per_product(field, quantities, sign):
+    """`field ± q` for every product in one CASE expression."""
+    return Case(
+        *[
+            When(id=product_id, then=F(field) + sign * quantity)
+            for product_id, quantity in quantities.items()
+        ],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _per_shard(quantities, sign):
+    """`stock ± q` for every (product_id, index) in one CASE expression."""
+    return Case(
+        *[
+            When(product_id=product_id, index=index, then=F("stock") + sign * quantity)
+            for (product_id, index), quantity in quantities.items()
+        ],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _shard_filter(quantities):
+    condition = Q(pk__in=[])
+    for product_id, index in quantities:
+        condition |= Q(product_id=product_id, index=index)
+    return condition
+
+
+def _invalidate_on_flip(deltas):
+    """
+    Bump the catalog version, after commit, if a product in `deltas`
+    ({product_id: change in free units}, already applied) went in or
+    out of stock. One query.
+    """
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    rows = Product.objects.filter(id__in=deltas).annotate(
+        shard_stock=Coalesce(Sum("stock_shards__stock"), 0)
+    ).values_list("id", "stock", "reserved", "shard_stock")
+    for product_id, stock, reserved, shard_stock in rows:
+        free = stock - reserved + shard_stock
+        if (free > 0) != (free - deltas[product_id] > 0):
+            transaction.on_commit(bump_catalog_version)
+            return
+
+
+def lock_products(product_ids, *fields):
+    return {
+        product.id: product
+        for product in Product.objects.select_for_update()
+        .filter(id__in=product_ids)
+        .order_by("id")
+        .only("id", *fields)
+    }
+
+
+def lock_shards(keys):
+    """Lock the ProductStockShard rows for [(product_id, index), ...]."""
+    list(
+        ProductStockShard.objects.select_for_update()
+        .filter(_shard_filter(keys))
+        .order_by("product_id", "index")
+        .values_list("id", flat=True)
+    )
+
+
+# -------------------------------------------------
+# TAKE
+# -------------------------------------------------
+def _take_from_shards(product_id, shard_count, quantity):
+    """
+    [(shard index, qty), ...] or None.
+    Fast path: one conditional UPDATE on a random shard, then its
+    neighbours. Slow path: lock all shards and gather from several.
+    """
+    start = random.randrange(shard_count)
+    for offset in range(shard_count):
+        index = (start + offset) % shard_count
+        taken = ProductStockShard.objects.filter(
+            product_id=product_id, index=index, stock__gte=quantity
+        ).update(stock=F("stock") - quantity)
+        if taken:
+            return [(index, quantity)]
+
+    shards = list(
+        ProductStockShard.objects.select_for_update()
+        .filter(product_id=product_id, index__lt=shard_count, stock__gt=0)
+        .order_by("index")
+    )
+    if sum(shard.stock for shard in shards) < quantity:
+        return None
+
+    allocations, remaining = [], quantity
+    for shard in shards:
+        take = min(shard.stock, remaining)
+        allocations.append((shard.index, take))
+        remaining -= take
+        if not remaining:
+            break
+
+    ProductStockShard.objects.filter(
+        _shard_filter({(product_id, index): take for index, take in allocations})
+    ).update(stock=_per_shard(
+        {(product_id, index): take for index, take in allocations}, -1
+    ))
+    return allocations
+
+
+def take_stock(quantities):
+    """
+    Take `quantities` ({product_id: qty}) out of available stock.
+    Returns [(product_id, shard index or None, qty), ...] for the holds.
+    Raises Product.DoesNotExist / InsufficientStock; run it inside the
+    checkout transaction so a failure rolls every take back.
+    """
+    shard_counts = dict(
+        Product.objects.filter(id__in=quantities).values_list("id", "shard_count")
+    )
+    if len(shard_counts) != len(quantities):
+        raise Product.DoesNotExist
+
+    allocations = []
+    unsharded = {}
+
+    # 1️⃣ hot products: shard counters, no product row lock
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        if not shard_counts[product_id]:
+            unsharded[product_id] = quantity
+            continue
+
+        taken = _take_from_shards(product_id, shard_counts[product_id], quantity)
+        if taken is None:
+            # shards exhausted: fall back to the product row
+            unsharded[product_id] = quantity
+            continue
+
+        allocations += [(product_id, index, qty) for index, qty in taken]
+
+    # 2️⃣ everything else: locked product rows, Product.reserved
+    if unsharded:
+        products = lock_products(unsharded, "stock", "reserved")
+        for product_id, quantity in unsharded.items():
+            if products[product_id].stock - products[product_id].reserved < quantity:
+                raise InsufficientStock(product_id)
+
+        Product.objects.filter(id__in=unsharded).update(
+            reserved=_per_product("reserved", unsharded, +1)
+        )
+        allocations += [(product_id, None, qty) for product_id, qty in unsharded.items()]
+
+    return allocations
+
+
+def reserve_stock(order, allocations):
+    """
+    Record `allocations` (from take_stock) as holds for `order` until it is
+    paid or the TTL passes.
+    """
+    expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    StockReservation.objects.bulk_create([
+        StockReservation(
+            order=order,
+            product_id=product_id,
+            shard=shard,
+            quantity=quantity,
+            expires_at=expires_at,
+        )
+        for product_id, shard, quantity in allocations
+    ])
+
+    taken = defaultdict(int)
+    for product_id, _, quantity in allocations:
+        taken[product_id] -= quantity
+    _invalidate_on_flip(taken)
+
+
+# -------------------------------------------------
+# COMMIT / RELEASE
+# -------------------------------------------------
+@transaction.atomic
+def commit_reservations(order_ids):
+    """
+    Turn the holds of `order_ids` into a permanent decrement. Call exactly
+    once per order, when it becomes paid. An order whose holds were swept
+    takes its units from free stock again; if they are gone it is logged
+    for a manual refund and stock is left alone.
+    """
+    holds = list(
+        StockReservation.objects.select_for_update()
+        .filter(order_id__in=order_ids)
+        .order_by("id")
+        .values_list("id", "order_id", "product_id", "shard", "quantity")
+    )
+
+    # paid after the holds were swept: take the units again the way
+    # checkout does, from free stock only (row, then shards)
+    swept_orders = set(order_ids) - {hold[1] for hold in holds}
+    swept = defaultdict(lambda: defaultdict(int))
+    for order_id, product_id, quantity in OrderItem.objects.filter(
+        order_id__in=swept_orders, product_id__isnull=False
+    ).values_list("order_id", "product_id", "quantity"):
+        swept[order_id][product_id] += quantity
+
+    taken = defaultdict(int)
+    for order_id in sorted(swept):
+        logger.warning("Order #%s paid after its reservation expired", order_id)
+        try:
+            with transaction.atomic():
+                allocations = take_stock(swept[order_id])
+        except (Product.DoesNotExist, InsufficientStock):
+            # paid all the same: the money is in, the units are not
+            logger.error(
+                "Order #%s paid but its stock was sold meanwhile: restock or refund it by hand",
+                order_id,
+            )
+            continue
+
+        # take_stock reserved row units; this order is paid, so commit them
+        from_rows = {product_id: qty for product_id, shard, qty in allocations if shard is None}
+        if from_rows:
+            Product.objects.filter(id__in=from_rows).update(
+                stock=_per_product("stock", from_rows, -1),
+                reserved=_per_product("reserved", from_rows, -1),
+            )
+        for product_id, quantity in swept[order_id].items():
+            taken[product_id] -= quantity
+
+    # shard holds already left their shard: dropping them is enough
+    held = defaultdict(int)
+    for _, _, product_id, shard, quantity in holds:
+        if shard is None:
+            held[product_id] += quantity
+
+    if held:
+        lock_products(held)
+        Product.objects.filter(id__in=held).update(
+            stock=_per_product("stock", held, -1),
+            reserved=_per_product("reserved", held, -1),
+        )
+    if holds:
+        StockReservation.objects.filter(id__in=[hold[0] for hold in holds]).delete()
+
+    # holds were already out of the free count; only swept orders change it
+    _invalidate_on_flip(taken)
+
+def release_holds(holds):
+    """
+    Give `holds` ([(id, product_id, shard, qty), ...], locked by the
+    caller) back to available stock and delete them. A shard hold whose
+    shard no longer exists (shard_count lowered since) goes to the
+    product row instead.
+    """
+    to_shards = defaultdict(int)
+    for _, product_id, shard, quantity in holds:
+        if shard is not None:
+            to_shards[(product_id, shard)] += quantity
+
+    if to_shards:
+        lock_shards(to_shards)
+    products = lock_products({hold[1] for hold in holds}, "shard_count")
+
+    # row holds: reserved -= q; orphaned shard holds: stock += q
+    to_reserved, to_stock = defaultdict(int), defaultdict(int)
+    for _, product_id, shard, quantity in holds:
+        if shard is None:
+            to_reserved[product_id] += quantity
+    for product_id, index in list(to_shards):
+        if index >= products[product_id].shard_count:
+            to_stock[product_id] += to_shards.pop((product_id, index))
+
+    if to_reserved:
+        Product.objects.filter(id__in=to_reserved).update(
+            reserved=_per_product("reserved", to_reserved, -1)
+        )
+    if to_stock:
+        Product.objects.filter(id__in=to_stock).update(
+            stock=_per_product("stock", to_stock, +1)
+        )
+    if to_shards:
+        ProductStockShard.objects.filter(_shard_filter(to_shards)).update(
+            stock=_per_shard(to_shards, +1)
+        )
+
+    StockReservation.objects.filter(id__in=[hold[0] for hold in holds]).delete()
+
+    freed = defaultdict(int)
+    for _, product_id, _, quantity in holds:
+        freed[product_id] += quantity
+    _invalidate_on_flip(freed)
+
+
+def release_expired_reservations(batch_size=1000, now=None):
+    """
+    Return expired holds to available stock in batches: per batch one
+    locked SELECT of holds, one CASE UPDATE each on products and shards,
+    one DELETE. Returns the number of holds released.
+    """
+    now = now or timezone.now()
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            holds = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by("id")
+                .values_list("id", "product_id", "shard", "quantity")[:batch_size]
+            )
+            if not holds:
+                break
+
+            release_holds(holds)
+
+        released += len(holds)
+
+    return released
+
+
+# -------------------------------------------------
+# SHARDING
+# -------------------------------------------------
+@transaction.atomic
+def rebalance_shards(product_id, shard_count):
+    """
+    Pool all free units of a product (its row plus every shard) and spread
+    them evenly over `shard_count` shards; 0 moves everything back onto
+    the product row. The row keeps exactly what its own outstanding holds
+    need; holds on dropped shards are returned to the row on release.
+    """
+    # shards first, then the product row: the order checkout locks in
+    shards = {
+        shard.index: shard
+        for shard in ProductStockShard.objects.select_for_update()
+        .filter(product_id=product_id)
+        .order_by("index")
+    }
+    product = Product.objects.select_for_update().get(id=product_id)
+
+    pool = product.stock - product.reserved + sum(shard.stock for shard in shards.values())
+    product.stock = product.reserved
+
+    if shard_count:
+        base, extra = divmod(pool, shard_count)
+    else:
+        product.stock += pool
+
+    for index in range(max(shard_count, len(shards) and max(shards) + 1)):
+        shard = shards.get(index) or ProductStockShard(product=product, index=index)
+        shard.stock = base + (index < extra) if index < shard_count else 0
+        shard.save()
+
+    product.shard_count = shard_count
+    product.save(update_fields=["stock", "shard_count"])
+    return pool
@@ -0,0 +1,77 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Product
+
+
+# =================================================
+# 🔎 FULL-TEXT PRODUCT SEARCH
+# =================================================
+# Index lives outside the ORM (see migration 0014_product_search):
+# - PostgreSQL: shop_product.search_vector (tsvector, GIN)
+# - SQLite:     shop_product_fts (FTS5), synced from shop/signals.py
+# Both rank name matches above description matches.
+
+PG_SEARCH_SQL = """
+    SELECT p.id
+    FROM shop_product p, websearch_to_tsquery('english', %s) q
+    WHERE p.search_vector @@ q
+    ORDER BY ts_rank(p.search_vector, q) DESC, p.id DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQLITE_SEARCH_SQL = """
+    SELECT rowid
+    FROM shop_product_fts
+    WHERE shop_product_fts MATCH %s
+    ORDER BY bm25(shop_product_fts, 10.0, 1.0), rowid DESC
+    LIMIT %s OFFSET %s
+"""
+
+
+def _fts5_query(query):
+    # quote every word so user input can't inject FTS5 syntax
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def search_product_ids(query, limit, offset=0):
+    """Ids of products matching `query`, best match first."""
+    if connection.vendor == "postgresql":
+        sql, term = PG_SEARCH_SQL, query
+    elif connection.vendor == "sqlite":
+        sql, term = SQLITE_SEARCH_SQL, _fts5_query(query)
+        if not term:
+            return []
+    else:
+        # no full-text index on this backend
+        return list(
+            Product.objects.filter(
+                Q(name__icontains=query) | Q(description__icontains=query)
+            ).values_list("id", flat=True)[offset:offset + limit]
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [term, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_product(product):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT OR REPLACE INTO shop_product_fts (rowid, name, description) "
+            "VALUES (%s, %s, %s)",
+            [product.id, product.name, product.description],
+        )
+
+
+def unindex_product(product_id):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM shop_product_fts WHERE rowid = %s", [product_id])
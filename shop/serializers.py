@@ -1,4 +1,6 @@
+from django.db.models import OuterRef, Subquery
 from rest_framework import serializers
+from .images import IMAGE_VARIANTS, image_url, image_urls
 from .models import (
     Product,
     ProductImage,
@@ -6,6 +8,7 @@ from .models import (
     Wishlist,
     Order,
     OrderItem,
+    ArchivedOrder,
 )
 
 
@@ -14,20 +17,57 @@ from .models import (
 # =================================================
 class ProductImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ("id", "image")
+        fields = ("id", "image", "variants")
+
+    def _urls(self, obj):
+        # rows saved before URLs were stored: build on the fly
+        # (`manage.py refresh_image_urls` backfills them)
+        return obj.urls or image_urls(obj.image)
 
     def get_image(self, obj):
-        return obj.image.url if obj.image else None
+        return self._urls(obj).get("original")
+
+    def get_variants(self, obj):
+        urls = self._urls(obj)
+        return {name: urls.get(name) for name in IMAGE_VARIANTS}
+
+
+# =================================================
+# ✂️ SPARSE FIELDSETS (?fields=id,name,price)
+# =================================================
+class SparseFieldsMixin:
+    """
+    Drops every field not listed in the request's `?fields=` param
+    (`id` is always kept). Only applies to the top-level serializer:
+    nested ones are built without a request in their context.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request")
+        fields = request.query_params.get("fields") if request else None
+        if not fields:
+            return
+
+        wanted = set(fields.split(",")) | {"id"}
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
 
 
 # =================================================
 # 🛍️ PRODUCT
 # =================================================
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
+    # units a customer can buy: the raw column excludes shard stock and
+    # includes units held by unpaid orders
+    stock = serializers.IntegerField(source="available_stock", read_only=True)
+    available_stock = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
@@ -37,6 +77,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "slug",
             "price",
             "stock",
+            "available_stock",
             "description",
             "images",
             "created_at",
@@ -45,6 +86,41 @@ class ProductSerializer(serializers.ModelSerializer):
         )
 
 
+# =================================================
+# 🃏 PRODUCT CARD (LIST PAGES)
+# =================================================
+# Plain dicts straight from `.values()`: no model instances, no DRF
+# field machinery, one query (first image via a correlated subquery).
+CARD_FIELDS = ("id", "name", "slug", "price", "image")
+
+# also selected so cursor pagination can read its position from each row
+SORT_FIELDS = ("created_at", "view_count")
+
+
+def product_cards(queryset):
+    first_image = ProductImage.objects.filter(
+        product=OuterRef("pk")
+    ).order_by("id")
+
+    return queryset.prefetch_related(None).annotate(
+        image=Subquery(first_image.values("urls")[:1]),
+        image_file=Subquery(first_image.values("image")[:1]),
+    ).values(*CARD_FIELDS, "image_file", *SORT_FIELDS)
+
+
+def render_cards(rows):
+    return [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "slug": row["slug"],
+            "price": str(row["price"]),
+            "image": image_url(row["image"], row["image_file"], "card"),
+        }
+        for row in rows
+    ]
+
+
 # =================================================
 # 📍 ADDRESS
 # =================================================
@@ -86,3 +162,43 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = "__all__"
+
+
+# =================================================
+# 🗄️ ARCHIVED ORDER
+# =================================================
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    """Items and address are the snapshots taken when it was archived."""
+
+    class Meta:
+        model = ArchivedOrder
+        exclude = ("archived_at",)
+
+
+# =================================================
+# 🧾 ORDER SUMMARY (HISTORY)
+# =================================================
+# Columns stored on Order at placement: one row per order, no items,
+# products or images.
+ORDER_SUMMARY_FIELDS = (
+    "id",
+    "status",
+    "total_amount",
+    "item_count",
+    "preview_image",
+    "created_at",
+)
+
+
+def render_order_summaries(rows):
+    return [
+        {
+            "id": row["id"],
+            "status": row["status"],
+            "total_amount": str(row["total_amount"]),
+            "item_count": row["item_count"],
+            "preview_image": row["preview_image"] or None,
+            "created_at": serializers.DateTimeField().to_representation(row["created_at"]),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .cache import bump_catalog_version
+from .models import Category, Product, ProductImage
+from .search import index_product, unindex_product
+
+
+# =================================================
+# ♻️ CATALOG CACHE INVALIDATION
+# =================================================
+def invalidate_catalog(sender, **kwargs):
+    # after commit: a request racing the save must not cache the old rows
+    # under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+for model in (Category, Product, ProductImage):
+    post_save.connect(
+        invalidate_catalog, sender=model, dispatch_uid=f"catalog-save-{model.__name__}"
+    )
+    post_delete.connect(
+        invalidate_catalog, sender=model, dispatch_uid=f"catalog-delete-{model.__name__}"
+    )
+
+
+# =================================================
+# 🔎 SEARCH INDEX SYNC (SQLite FTS5; Postgres is a generated column)
+# =================================================
+SEARCHABLE_FIELDS = {"name", "description"}
+
+
+def sync_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHABLE_FIELDS & set(update_fields):
+        return
+    index_product(instance)
+
+
+def drop_from_search_index(sender, instance, **kwargs):
+    unindex_product(instance.id)
+
+
+post_save.connect(sync_search_index, sender=Product, dispatch_uid="search-save")
+post_delete.connect(drop_from_search_index, sender=Product, dispatch_uid="search-delete")
+
+
+# =================================================
+# 📂 CATEGORY PRODUCT COUNTS (FACETS)
+# =================================================
+def _adjust_product_count(category_id, delta):
+    Category.objects.filter(pk=category_id).update(
+        product_count=F("product_count") + delta
+    )
+
+
+def remember_category(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and "category" not in update_fields):
+        instance._previous_category_id = instance.category_id
+        return
+    instance._previous_category_id = (
+        Product.objects.filter(pk=instance.pk).values_list("category_id", flat=True).first()
+    )
+
+
+def count_saved_product(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_category_id", None)
+    if created:
+        _adjust_product_count(instance.category_id, 1)
+    elif previous is not None and previous != instance.category_id:
+        _adjust_product_count(previous, -1)
+        _adjust_product_count(instance.category_id, 1)
+
+
+def count_deleted_product(sender, instance, **kwargs):
+    Category.objects.filter(pk=instance.category_id, product_count__gt=0).update(
+        product_count=F("product_count") - 1
+    )
+
+
+pre_save.connect(remember_category, sender=Product, dispatch_uid="count-pre-save")
+post_save.connect(count_saved_product, sender=Product, dispatch_uid="count-save")
+post_delete.connect(count_deleted_product, sender=Product, dispatch_uid="count-delete")
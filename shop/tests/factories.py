@@ -0,0 +1,55 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import F
+from django.utils import timezone
+
+from shop.models import Address, Category, Order, OrderItem, Product, StockReservation
+from shop.permissions import IsAuthenticatedWithAuth0
+
+USER = "auth0|test-user"
+
+
+def make_product(stock=10, **fields):
+    category, _ = Category.objects.get_or_create(slug="test", defaults={"name": "Test"})
+    n = Product.objects.count()
+    return Product.objects.create(
+        name=f"Product {n}", slug=f"product-{n}", category=category, price=100, stock=stock, **fields
+    )
+
+
+def make_address(user=USER):
+    return Address.objects.create(
+        auth0_user_id=user, name="Test", phone="0", street="Street", city="City", pincode="000000"
+    )
+
+
+def make_order(items, age=None, **fields):
+    """An order with `items` [(product, qty), ...], optionally `age` old."""
+    fields.setdefault("auth0_user_id", USER)
+    order = Order.objects.create(total_amount=sum(100 * qty for _, qty in items), **fields)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, price=100, quantity=qty) for product, qty in items
+    ])
+    if age is not None:
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - age)
+    return order
+
+
+def hold(order, product, quantity, shard=None, expires_in=timedelta(minutes=15)):
+    """A hold as checkout leaves it: the units counted in Product.reserved."""
+    if shard is None:
+        Product.objects.filter(id=product.id).update(reserved=F("reserved") + quantity)
+    return StockReservation.objects.create(
+        order=order, product=product, shard=shard, quantity=quantity,
+        expires_at=timezone.now() + expires_in,
+    )
+
+
+def authenticated(user=USER):
+    """Let every request through IsAuthenticatedWithAuth0 as `user`."""
+    def has_permission(self, request, view):
+        request.auth0_user_id = user
+        return True
+
+    return mock.patch.object(IsAuthenticatedWithAuth0, "has_permission", has_permission)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import TestCase
+
+from shop.archive import archive_orders
+from shop.models import ArchivedOrder, Order
+
+from .factories import authenticated, make_address, make_order, make_product
+
+
+class ArchiveOrdersTests(TestCase):
+    def setUp(self):
+        self.product = make_product()
+        self.address = make_address()
+
+    def test_moves_old_finished_orders_with_their_snapshots(self):
+        delivered = make_order(
+            [(self.product, 2)], age=timedelta(days=400), status="delivered", address=self.address
+        )
+        cancelled = make_order([(self.product, 1)], age=timedelta(days=400), status="cancelled")
+        delivered.refresh_from_db()
+
+        self.assertEqual(archive_orders(older_than_days=365, batch_size=1), 2)
+
+        self.assertFalse(Order.objects.exists())
+        archived = ArchivedOrder.objects.get(id=delivered.id)
+        self.assertEqual(archived.status, "delivered")
+        self.assertEqual((archived.created_at, archived.total_amount), (delivered.created_at, 200))
+        self.assertEqual(archived.items, [
+            {"product_id": self.product.id, "name": self.product.name, "price": "100.00", "quantity": 2},
+        ])
+        self.assertEqual(archived.address["street"], "Street")
+        self.assertIsNone(ArchivedOrder.objects.get(id=cancelled.id).address)
+
+    def test_leaves_recent_and_open_orders(self):
+        make_order([(self.product, 1)], age=timedelta(days=10), status="delivered")
+        make_order([(self.product, 1)], age=timedelta(days=400), status="pending")
+        make_order([(self.product, 1)], age=timedelta(days=400), status="shipped")
+
+        self.assertEqual(archive_orders(older_than_days=365), 0)
+        self.assertEqual(Order.objects.count(), 3)
+
+
+class ArchivedOrderReadTests(TestCase):
+    def setUp(self):
+        patcher = authenticated()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        product = make_product()
+        # newest first: days 1..6, the three oldest archived
+        self.orders = [
+            make_order([(product, 1)], age=timedelta(days=day), status="delivered")
+            for day in range(1, 7)
+        ]
+        self.others = [
+            make_order([(product, 1)], status="pending", auth0_user_id="auth0|someone-else"),
+            make_order(
+                [(product, 1)], age=timedelta(days=5), status="delivered",
+                auth0_user_id="auth0|someone-else",
+            ),
+        ]
+        archive_orders(older_than_days=3.5)
+
+    def test_history_pages_over_both_tables(self):
+        seen, pages = [], []
+        url = "/api/orders/history/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            pages.append(page)
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(ArchivedOrder.objects.count(), 4)
+        self.assertEqual(seen, [order.id for order in self.orders])
+
+        # and back from the last page
+        back = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual([row["id"] for row in back["results"]], seen[2:4])
+
+    def test_detail_falls_back_to_the_archive(self):
+        archived = self.orders[-1]
+
+        response = self.client.get(f"/api/orders/{archived.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "delivered")
+        self.assertEqual(len(response.json()["items"]), 1)
+
+    def test_detail_of_another_users_order_is_not_found(self):
+        for other in self.others:
+            self.assertEqual(self.client.get(f"/api/orders/{other.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/orders/999999/").status_code, 404)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+
+from shop.models import Order, Product, StockReservation
+from shop.order_status import expire_pending_orders
+from shop.payments import reset_razorpay_client
+from shop.reconciliation import reconcile_payments
+from shop.utils.fake_razorpay import FakeRazorpayServer
+
+from .factories import hold, make_order, make_product
+
+TTL = 3600
+STALE = timedelta(seconds=TTL + 60)
+
+
+@override_settings(PENDING_ORDER_TTL=TTL)
+class ExpirePendingOrdersTests(TestCase):
+    def setUp(self):
+        self.product = make_product(stock=10)
+
+    def test_cancels_stale_orders_and_releases_their_holds(self):
+        order = make_order([(self.product, 3)], age=STALE)
+        hold(order, self.product, 3)
+
+        self.assertEqual(expire_pending_orders(), (1, 1))
+
+        self.assertEqual(Order.objects.get().status, "cancelled")
+        self.assertFalse(StockReservation.objects.exists())
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual((product.stock, product.reserved), (10, 0))
+
+    def test_leaves_young_paid_and_razorpay_orders_alone(self):
+        young = make_order([(self.product, 1)], age=timedelta(minutes=5))
+        paid = make_order([(self.product, 1)], age=STALE, status="paid")
+        # may have been paid with the webhook lost: reconcile's to decide
+        razorpay = make_order([(self.product, 1)], age=STALE, razorpay_order_id="order_1")
+        hold(razorpay, self.product, 1)
+
+        self.assertEqual(expire_pending_orders(), (0, 0))
+
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {young.id: "pending", paid.id: "paid", razorpay.id: "pending"},
+        )
+        self.assertEqual(Product.objects.get(id=self.product.id).reserved, 1)
+
+
+@override_settings(PENDING_ORDER_TTL=TTL, RAZORPAY_KEY_ID="rzp_test", RAZORPAY_KEY_SECRET="secret")
+class ReconcilePaymentsTests(TestCase):
+    def setUp(self):
+        self.server = FakeRazorpayServer().start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(RAZORPAY_BASE_URL=self.server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_razorpay_client()
+        self.addCleanup(reset_razorpay_client)
+
+        self.product = make_product(stock=10)
+
+    def razorpay_order(self, age, captured=False):
+        razorpay_order_id = self.server.add_order(100)
+        if captured:
+            self.server.capture(razorpay_order_id)
+        order = make_order([(self.product, 1)], age=age, razorpay_order_id=razorpay_order_id)
+        hold(order, self.product, 1)
+        return order
+
+    def test_pays_captured_and_cancels_stale_uncaptured_orders(self):
+        captured = self.razorpay_order(STALE, captured=True)
+        abandoned = self.razorpay_order(STALE)
+        waiting = self.razorpay_order(timedelta(minutes=10))
+
+        stats = reconcile_payments(workers=2)
+
+        self.assertEqual(
+            (stats["checked"], stats["paid"], stats["cancelled"], stats["errors"]),
+            (3, 1, 1, 0),
+        )
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {captured.id: "paid", abandoned.id: "cancelled", waiting.id: "pending"},
+        )
+        product = Product.objects.get(id=self.product.id)
+        # one unit sold, one released, one still held
+        self.assertEqual((product.stock, product.reserved), (9, 1))
+
+    def test_leaves_recent_orders_to_the_webhook(self):
+        self.razorpay_order(timedelta(seconds=30), captured=True)
+
+        self.assertEqual(reconcile_payments()["checked"], 0)
+        self.assertEqual(Order.objects.get().status, "pending")
+
+    def test_unknown_razorpay_order_is_counted_as_an_error(self):
+        make_order([], age=STALE, razorpay_order_id="order_missing")
+
+        with self.assertLogs("shop.reconciliation", "WARNING"):
+            stats = reconcile_payments()
+
+        self.assertEqual((stats["errors"], stats["cancelled"]), (1, 0))
+        self.assertEqual(Order.objects.get().status, "pending")
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop.models import Address, IdempotencyKey, Order
+
+from .factories import USER, authenticated, make_address, make_product
+
+URL = "/api/orders/place/"
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.product = make_product(stock=10)
+        self.address = make_address()
+        patcher = authenticated()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def place(self, quantity=1, **headers):
+        return self.client.post(
+            URL,
+            {
+                "items": [{"product_id": self.product.id, "quantity": quantity, "price": 100}],
+                "address_id": self.address.id,
+            },
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+        retry = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_another_body_is_refused(self):
+        self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        response = self.place(quantity=2, HTTP_IDEMPOTENCY_KEY="k1")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_without_a_key_every_request_runs(self):
+        self.place()
+        self.place()
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_overlong_key_is_refused(self):
+        response = self.place(HTTP_IDEMPOTENCY_KEY="k" * 256)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_client_errors_are_replayed_too(self):
+        Address.objects.filter(id=self.address.id).delete()
+
+        first = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+        retry = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        self.assertEqual(first.status_code, 404)
+        self.assertEqual(retry.status_code, 404)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_raised_errors_release_the_key(self):
+        self.assertEqual(self.place(quantity=50, HTTP_IDEMPOTENCY_KEY="k1").status_code, 403)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.place(quantity=5, HTTP_IDEMPOTENCY_KEY="k1").status_code, 201)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_abandoned_key_is_reclaimed(self):
+        record = IdempotencyKey.objects.create(
+            auth0_user_id=USER, endpoint="place-order", key="k1", request_hash="x",
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        IdempotencyKey.objects.filter(id=record.id).update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        response = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        with authenticated("auth0|someone-else"):
+            response = self.place(HTTP_IDEMPOTENCY_KEY="k1")
+
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Order.objects.count(), 2)
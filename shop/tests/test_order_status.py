@@ -0,0 +1,129 @@
+import hashlib
+import hmac
+
+from django.test import TestCase, override_settings
+
+from shop.models import Order, Product
+from shop.order_status import InvalidTransition, mark_many_paid, mark_paid, transition
+from shop.webhooks import handle_payment_captured
+
+from .factories import authenticated, hold, make_order, make_product
+
+SECRET = "test-secret"
+
+
+class TransitionTests(TestCase):
+    def test_only_allowed_statuses_move(self):
+        pending = make_order([], status="pending")
+        shipped = make_order([], status="shipped")
+
+        moved = transition(Order.objects.all(), "cancelled")
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(Order.objects.get(id=pending.id).status, "cancelled")
+        self.assertEqual(Order.objects.get(id=shipped.id).status, "shipped")
+
+    def test_unknown_target_is_refused(self):
+        with self.assertRaises(InvalidTransition):
+            transition(Order.objects.all(), "pending")
+
+    def test_mark_paid_wins_once(self):
+        product = make_product(stock=5)
+        order = make_order([(product, 2)], razorpay_order_id="order_1")
+        hold(order, product, 2)
+
+        self.assertTrue(mark_paid("order_1", razorpay_payment_id="pay_1"))
+        self.assertFalse(mark_paid("order_1", razorpay_payment_id="pay_2"))
+
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.razorpay_payment_id), ("paid", "pay_1"))
+        self.assertEqual(Product.objects.get(id=product.id).stock, 3)
+
+    def test_mark_many_paid_skips_orders_no_longer_pending(self):
+        make_order([], razorpay_order_id="order_1")
+        make_order([], razorpay_order_id="order_2", status="cancelled")
+
+        self.assertEqual(mark_many_paid({"order_1": "pay_1", "order_2": "pay_2"}), 1)
+
+        self.assertEqual(
+            dict(Order.objects.values_list("razorpay_order_id", "status")),
+            {"order_1": "paid", "order_2": "cancelled"},
+        )
+
+
+@override_settings(RAZORPAY_KEY_ID="rzp_test", RAZORPAY_KEY_SECRET=SECRET)
+class VerifyPaymentTests(TestCase):
+    def setUp(self):
+        patcher = authenticated()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def verify(self, razorpay_order_id, payment_id="pay_1", signature=None):
+        if signature is None:
+            signature = hmac.new(
+                SECRET.encode(), f"{razorpay_order_id}|{payment_id}".encode(), hashlib.sha256
+            ).hexdigest()
+        return self.client.post(
+            "/api/payments/razorpay/verify/",
+            {
+                "razorpay_order_id": razorpay_order_id,
+                "razorpay_payment_id": payment_id,
+                "razorpay_signature": signature,
+            },
+            content_type="application/json",
+        )
+
+    def test_pays_the_order(self):
+        make_order([], razorpay_order_id="order_1")
+
+        response = self.verify("order_1")
+
+        self.assertEqual(response.json(), {"status": "success"})
+        self.assertEqual(Order.objects.get().status, "paid")
+
+    def test_repeat_verify_of_a_paid_order_succeeds(self):
+        make_order([], razorpay_order_id="order_1")
+        self.verify("order_1")
+
+        self.assertEqual(self.verify("order_1").status_code, 200)
+
+    def test_verify_after_expiry_is_a_conflict(self):
+        make_order([], razorpay_order_id="order_1", status="cancelled")
+
+        with self.assertLogs("shop.order_status", "ERROR"):
+            response = self.verify("order_1")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["status"], "cancelled")
+        self.assertEqual(Order.objects.get().status, "cancelled")
+
+    def test_bad_signature_is_refused(self):
+        make_order([], razorpay_order_id="order_1")
+
+        self.assertEqual(self.verify("order_1", signature="forged").status_code, 400)
+        self.assertEqual(Order.objects.get().status, "pending")
+
+    def test_unknown_order(self):
+        self.assertEqual(self.verify("order_missing").status_code, 404)
+
+
+class CapturedWebhookTests(TestCase):
+    def captured(self, razorpay_order_id):
+        handle_payment_captured({
+            "payload": {"payment": {"entity": {"order_id": razorpay_order_id, "id": "pay_1"}}}
+        })
+
+    def test_pays_the_order(self):
+        make_order([], razorpay_order_id="order_1")
+
+        self.captured("order_1")
+
+        self.assertEqual(Order.objects.get().status, "paid")
+
+    def test_capture_on_a_cancelled_order_is_logged(self):
+        make_order([], razorpay_order_id="order_1", status="cancelled")
+
+        with self.assertLogs("shop.order_status", "ERROR"):
+            self.captured("order_1")
+
+        self.assertEqual(Order.objects.get().status, "cancelled")
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.test import TestCase
+
+from shop.models import Order, Product, ProductStockShard, StockReservation
+from shop.order_status import mark_paid
+from shop.reservations import (
+    InsufficientStock,
+    rebalance_shards,
+    release_expired_reservations,
+    reserve_stock,
+    take_stock,
+)
+
+from .factories import hold, make_order, make_product
+
+
+def stock_of(product):
+    return Product.objects.filter(id=product.id).values_list("stock", "reserved").get()
+
+
+class ReservationTests(TestCase):
+    def test_checkout_holds_stock_instead_of_decrementing_it(self):
+        product = make_product(stock=5)
+        order = make_order([(product, 2)])
+
+        reserve_stock(order, take_stock({product.id: 2}))
+
+        self.assertEqual(stock_of(product), (5, 2))
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+    def test_checkout_fails_when_free_stock_is_short(self):
+        product = make_product(stock=5, reserved=4)
+
+        with self.assertRaises(InsufficientStock):
+            take_stock({product.id: 2})
+
+    def test_payment_commits_the_hold(self):
+        product = make_product(stock=5)
+        order = make_order([(product, 2)], razorpay_order_id="order_1")
+        hold(order, product, 2)
+
+        self.assertTrue(mark_paid("order_1"))
+
+        self.assertEqual(stock_of(product), (3, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_expired_holds_are_released(self):
+        product = make_product(stock=5)
+        hold(make_order([(product, 2)]), product, 2, expires_in=timedelta(minutes=-1))
+        hold(make_order([(product, 1)]), product, 1)
+
+        self.assertEqual(release_expired_reservations(), 1)
+
+        self.assertEqual(stock_of(product), (5, 1))
+
+
+class LatePaymentTests(TestCase):
+    """Paid after the sweeper released the holds."""
+
+    def test_takes_the_units_from_free_stock(self):
+        product = make_product(stock=10, reserved=4)
+        make_order([(product, 3)], razorpay_order_id="order_late")
+
+        with self.assertLogs("shop.reservations", "WARNING"):
+            self.assertTrue(mark_paid("order_late"))
+
+        self.assertEqual(stock_of(product), (7, 4))
+
+    def test_leaves_stock_alone_when_it_was_sold_meanwhile(self):
+        product = make_product(stock=5)
+        late = make_order([(product, 3)], razorpay_order_id="order_late")
+        current = make_order([(product, 4)], razorpay_order_id="order_current")
+        hold(current, product, 4)
+
+        with self.assertLogs("shop.reservations", "WARNING") as logs:
+            self.assertTrue(mark_paid("order_late"))
+        self.assertIn("ERROR", [record.levelname for record in logs.records])
+
+        self.assertEqual(Order.objects.get(id=late.id).status, "paid")
+        self.assertEqual(stock_of(product), (5, 4))
+
+        # the holder can still pay
+        self.assertTrue(mark_paid("order_current"))
+        self.assertEqual(stock_of(product), (1, 0))
+
+
+class ShardTests(TestCase):
+    def shards(self, product):
+        return list(
+            ProductStockShard.objects.filter(product=product)
+            .order_by("index").values_list("stock", flat=True)
+        )
+
+    def test_rebalance_spreads_free_stock(self):
+        product = make_product(stock=10, reserved=3)
+
+        self.assertEqual(rebalance_shards(product.id, 3), 7)
+
+        self.assertEqual(stock_of(product), (3, 3))
+        self.assertEqual(self.shards(product), [3, 2, 2])
+
+    def test_checkout_takes_from_shards_and_release_puts_back(self):
+        product = make_product(stock=8)
+        rebalance_shards(product.id, 2)
+        order = make_order([(product, 3)])
+
+        reserve_stock(order, take_stock({product.id: 3}))
+        self.assertEqual(sum(self.shards(product)), 5)
+        self.assertEqual(stock_of(product), (0, 0))
+
+        StockReservation.objects.update(expires_at=order.created_at)
+        release_expired_reservations()
+        self.assertEqual(sum(self.shards(product)), 8)
+
+    def test_release_after_shards_were_dropped_returns_to_product(self):
+        product = make_product(stock=8)
+        rebalance_shards(product.id, 2)
+        order = make_order([(product, 3)])
+        reserve_stock(order, take_stock({product.id: 3}))
+
+        rebalance_shards(product.id, 0)
+        StockReservation.objects.update(expires_at=order.created_at)
+        release_expired_reservations()
+
+        self.assertEqual(stock_of(product), (8, 0))
+        self.assertEqual(sum(self.shards(product)), 0)
+
+    def test_late_payment_takes_from_shards(self):
+        product = make_product(stock=8)
+        rebalance_shards(product.id, 2)
+        make_order([(product, 5)], razorpay_order_id="order_late")
+
+        with self.assertLogs("shop.reservations", "WARNING"):
+            self.assertTrue(mark_paid("order_late"))
+
+        self.assertEqual(sum(self.shards(product)), 3)
+
+    def test_available_stock_includes_shards(self):
+        product = make_product(stock=10, reserved=2)
+        rebalance_shards(product.id, 2)
+
+        self.assertEqual(Product.objects.with_available_stock().get(id=product.id).available_stock, 8)
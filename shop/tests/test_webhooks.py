@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop.models import Order, WebhookEvent
+from shop.webhooks import MAX_ATTEMPTS, RETRY_BACKOFF, enqueue, process_webhook_events
+
+from .factories import make_order
+
+SECRET = "webhook-secret"
+
+
+def captured(razorpay_order_id, payment_id="pay_1"):
+    return {
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {"order_id": razorpay_order_id, "id": payment_id}}},
+    }
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=SECRET)
+class WebhookViewTests(TestCase):
+    def deliver(self, payload, event_id="evt_1", signature=None):
+        body = json.dumps(payload).encode()
+        if signature is None:
+            signature = hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            "/api/payments/razorpay/webhook/",
+            body,
+            content_type="application/json",
+            headers={"X-Razorpay-Signature": signature, "X-Razorpay-Event-Id": event_id},
+        )
+
+    def test_redelivery_is_stored_once(self):
+        self.assertEqual(self.deliver(captured("order_1")).status_code, 200)
+        self.assertEqual(self.deliver(captured("order_1")).status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_bad_signature_is_refused(self):
+        response = self.deliver(captured("order_1"), signature="forged")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_worker_applies_the_event(self):
+        make_order([], razorpay_order_id="order_1")
+        self.deliver(captured("order_1"))
+
+        self.assertEqual(process_webhook_events(), 1)
+
+        self.assertEqual(Order.objects.get().status, "paid")
+        self.assertIsNotNone(WebhookEvent.objects.get().processed_at)
+        self.assertEqual(process_webhook_events(), 0)
+
+
+class RetryTests(TestCase):
+    def setUp(self):
+        self.start = timezone.now()
+        # missing "payload" makes the handler raise
+        enqueue("evt_broken", {"event": "payment.captured"})
+        WebhookEvent.objects.update(next_attempt_at=self.start)
+
+    def process_at(self, when):
+        with mock.patch("shop.webhooks.timezone.now", return_value=when), \
+                self.assertLogs("shop.webhooks", "ERROR"):
+            return process_webhook_events()
+
+    def test_failure_backs_off_exponentially(self):
+        self.process_at(self.start)
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("KeyError", event.last_error)
+        self.assertEqual(event.next_attempt_at, self.start + timedelta(seconds=RETRY_BACKOFF))
+
+        # not due yet: nothing is claimed
+        early = self.start + timedelta(seconds=RETRY_BACKOFF - 1)
+        with mock.patch("shop.webhooks.timezone.now", return_value=early):
+            self.assertEqual(process_webhook_events(), 0)
+
+        retry = event.next_attempt_at
+        self.process_at(retry)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 2)
+        self.assertEqual(event.next_attempt_at, retry + timedelta(seconds=2 * RETRY_BACKOFF))
+
+    def test_gives_up_after_max_attempts(self):
+        WebhookEvent.objects.update(attempts=MAX_ATTEMPTS - 1)
+        self.process_at(self.start)
+
+        with mock.patch("shop.webhooks.timezone.now", return_value=self.start + timedelta(days=1)):
+            self.assertEqual(process_webhook_events(), 0)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.attempts, MAX_ATTEMPTS)
+        self.assertIsNone(event.processed_at)
+
+    def test_one_failure_does_not_block_the_batch(self):
+        make_order([], razorpay_order_id="order_1")
+        enqueue("evt_ok", captured("order_1"))
+        WebhookEvent.objects.update(next_attempt_at=self.start)
+
+        self.assertEqual(self.process_at(self.start), 2)
+
+        self.assertEqual(Order.objects.get().status, "paid")
+        self.assertIsNotNone(WebhookEvent.objects.get(event_id="evt_ok").processed_at)
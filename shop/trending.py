@@ -0,0 +1,107 @@
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import ProductViewBucket, TrendingScore
+
+
+# =================================================
+# 🔥 TIME-DECAYED TRENDING
+# =================================================
+# score(t) = Σ views_h · 2^(-(t - h) / half_life)  over hourly buckets h
+#
+# Exponential decay makes this incremental: moving from t1 to t2 multiplies
+# every stored score by one factor (a single UPDATE) and only the buckets
+# completed since t1 have to be read and added.
+
+# Scores below this are dropped from the table (≈ one view, 10 half-lives ago)
+MIN_SCORE = 0.001
+
+
+def _current_hour(now=None):
+    return (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def _decay(hours, half_life_hours):
+    return math.pow(0.5, hours / half_life_hours)
+
+
+@transaction.atomic
+def recompute_trending(half_life_hours=24, top=50, lookback_hours=168, now=None):
+    """
+    Fold every completed hourly bucket since the last run into
+    TrendingScore, then re-materialize the top-N `rank` column.
+    The in-progress hour is left for the next run.
+    """
+    through = _current_hour(now)
+    last = TrendingScore.objects.aggregate(last=Max("computed_through"))["last"]
+    start = last or through - timedelta(hours=lookback_hours)
+
+    if last and last < through:
+        factor = _decay((through - last) / timedelta(hours=1), half_life_hours)
+        TrendingScore.objects.update(score=F("score") * factor, computed_through=through)
+
+    # 1️⃣ add buckets completed since the last run
+    added = {}
+    buckets = ProductViewBucket.objects.filter(
+        hour__gte=start, hour__lt=through
+    ).values_list("product_id", "hour", "views")
+
+    for product_id, hour, views in buckets.iterator():
+        age = (through - hour) / timedelta(hours=1)
+        added[product_id] = added.get(product_id, 0) + views * _decay(age, half_life_hours)
+
+    existing = TrendingScore.objects.in_bulk(list(added))
+    for product_id, score in added.items():
+        if product_id in existing:
+            existing[product_id].score += score
+        else:
+            existing[product_id] = TrendingScore(
+                product_id=product_id, score=score, computed_through=through
+            )
+
+    TrendingScore.objects.bulk_create(
+        [row for row in existing.values() if row._state.adding]
+    )
+    TrendingScore.objects.bulk_update(
+        [row for row in existing.values() if not row._state.adding], ["score"]
+    )
+
+    # 2️⃣ prune what has decayed away
+    TrendingScore.objects.filter(score__lt=MIN_SCORE).delete()
+    ProductViewBucket.objects.filter(
+        hour__lt=through - timedelta(hours=lookback_hours)
+    ).delete()
+
+    # 3️⃣ materialize the ranking
+    previous = list(
+        TrendingScore.objects.filter(rank__isnull=False)
+        .order_by("rank")
+        .values_list("product_id", flat=True)
+    )
+    leaders = list(
+        TrendingScore.objects.order_by("-score", "product_id")
+        .values_list("product_id", flat=True)[:top]
+    )
+
+    if leaders != previous:
+        TrendingScore.objects.filter(rank__isnull=False).update(rank=None)
+        TrendingScore.objects.bulk_update(
+            [
+                TrendingScore(product_id=product_id, rank=rank)
+                for rank, product_id in enumerate(leaders, start=1)
+            ],
+            ["rank"],
+        )
+        transaction.on_commit(bump_catalog_version)
+
+    return {
+        "computed_through": through,
+        "products_updated": len(added),
+        "ranked": len(leaders),
+        "ranking_changed": leaders != previous,
+    }
@@ -2,11 +2,15 @@ from django.urls import path
 from .views import (
     ProductListView,
     TrendingProductListView,
+    ProductSearchView,
+    ProductBatchView,
+    CategoryProductListView,
     ProductDetailView,
     AddressView,
     WishlistView,
     PlaceOrderView,
     OrderHistoryView,
+    OrderDetailView,
     RazorpayCreateOrderView,
     RazorpayVerifyPaymentView,
     RazorpayWebhookView,
@@ -16,7 +20,14 @@ urlpatterns = [
     # 🛍 Products
     path("products/", ProductListView.as_view(), name="products"),
     path("products/trending/", TrendingProductListView.as_view(), name="trending-products"),
+    path("products/search/", ProductSearchView.as_view(), name="product-search"),
+    path("products/batch/", ProductBatchView.as_view(), name="product-batch"),
     path("products/<slug:slug>/", ProductDetailView.as_view(), name="product-detail"),
+    path(
+        "categories/<slug:slug>/products/",
+        CategoryProductListView.as_view(),
+        name="category-products",
+    ),
 
     # 📍 Address
     path("addresses/", AddressView.as_view(), name="addresses"),
@@ -27,6 +38,7 @@ urlpatterns = [
     # 🧾 Orders
     path("orders/place/", PlaceOrderView.as_view(), name="place-order"),
     path("orders/history/", OrderHistoryView.as_view(), name="order-history"),
+    path("orders/<int:pk>/", OrderDetailView.as_view(), name="order-detail"),
 
     # 💳 Razorpay
     path("payments/razorpay/create/", RazorpayCreateOrderView.as_view(), name="razorpay-create"),
@@ -1,11 +1,8 @@
-import json
-import requests
 from jose import jwt
 from django.conf import settings
 from rest_framework.exceptions import AuthenticationFailed
 
-
-JWKS_URL = f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
+from .jwks import get_signing_key
 
 
 def get_token_from_header(request):
@@ -26,20 +23,9 @@ def get_token_from_header(request):
 
 
 def verify_auth0_token(token):
-    jwks = requests.get(JWKS_URL).json()
-
     unverified_header = jwt.get_unverified_header(token)
 
-    rsa_key = None
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"],
-            }
+    rsa_key = get_signing_key(unverified_header)
 
     if not rsa_key:
         raise AuthenticationFailed("Unable to find matching RSA key")
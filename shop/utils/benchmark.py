@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import CommandError
+
+
+def require_debug():
+    """
+    Benchmarks create (and delete) throwaway rows and load the database:
+    refuse to run them against anything but a development setup.
+    """
+    if not settings.DEBUG:
+        raise CommandError(
+            "Benchmarks write to the configured database: run them with "
+            "DEBUG=True against a development or scratch database"
+        )
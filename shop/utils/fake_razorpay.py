@@ -0,0 +1,132 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =================================================
+# 🧪 FAKE RAZORPAY API (LOCAL TESTING ONLY)
+# =================================================
+# Just enough of https://api.razorpay.com/v1 for this shop: create and
+# fetch orders, list an order's payments. Speaks HTTP/1.1 keep-alive so
+# connection pooling is exercised like against the real API; `delay`
+# adds artificial latency to every response.
+
+ORDER_PATH = re.compile(r"^/v1/orders/(?P<id>[\w-]+)(?P<payments>/payments)?/?$")
+
+
+class FakeRazorpayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; without this, keep-alive
+    # connections stall ~40ms per response on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _not_found(self):
+        self._send(404, {"error": {
+            "code": "BAD_REQUEST_ERROR",
+            "description": "The id provided does not exist",
+        }})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.delay)
+
+        if self.path.rstrip("/") != "/v1/orders":
+            return self._not_found()
+
+        data = json.loads(body or b"{}")
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": data.get("amount"),
+            "amount_paid": 0,
+            "currency": data.get("currency", "INR"),
+            "receipt": data.get("receipt"),
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        with self.server.lock:
+            self.server.orders[order["id"]] = order
+        self._send(200, order)
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+
+        match = ORDER_PATH.match(self.path.split("?")[0])
+        with self.server.lock:
+            order = match and self.server.orders.get(match["id"])
+            payments = match and list(self.server.payments.get(match["id"], []))
+
+        if not order:
+            return self._not_found()
+
+        if match["payments"]:
+            return self._send(200, {
+                "entity": "collection",
+                "count": len(payments),
+                "items": payments,
+            })
+        self._send(200, order)
+
+
+class FakeRazorpayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        super().__init__((host, port), FakeRazorpayHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.payments = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_order(self, amount, currency="INR", status="created"):
+        order_id = f"order_{uuid.uuid4().hex[:14]}"
+        with self.lock:
+            self.orders[order_id] = {
+                "id": order_id,
+                "entity": "order",
+                "amount": amount,
+                "amount_paid": 0,
+                "currency": currency,
+                "status": status,
+                "created_at": int(time.time()),
+            }
+        return order_id
+
+    def capture(self, order_id):
+        """Simulate a successful payment on an order."""
+        payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+        with self.lock:
+            order = self.orders[order_id]
+            order.update(status="paid", amount_paid=order["amount"])
+            self.payments.setdefault(order_id, []).append({
+                "id": payment_id,
+                "entity": "payment",
+                "order_id": order_id,
+                "amount": order["amount"],
+                "status": "captured",
+            })
+        return payment_id
+
+    def start(self):
+        """Serve from a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
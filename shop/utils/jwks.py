@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from jose import jwk
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyStore:
+    """
+    Process-wide cache of Auth0 signing keys, shared by every auth path.
+    - Keys are parsed once (jwk.construct) and kept by `kid`, so
+      verification never re-parses a JWK or converts it to PEM
+    - The JWKS is re-fetched after `ttl` seconds
+    - An unknown `kid` (key rotation) triggers an early refresh, at most
+      once every `min_refresh_interval` seconds so bogus kids can't
+      hammer Auth0
+    - If a refresh fails the previous keys keep being served
+    """
+
+    def __init__(self, ttl=None, min_refresh_interval=None, timeout=5):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
+
+    def get_key(self, kid):
+        """Parsed public key for `kid`, or None if Auth0 doesn't publish it."""
+        if self._is_stale():
+            self.refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            self.refresh(kid_miss=True)
+            key = self._keys.get(kid)
+
+        return key
+
+    def refresh(self, kid_miss=False):
+        with self._lock:
+            # another thread may have refreshed while we waited
+            if not kid_miss and not self._is_stale():
+                return
+            # every fetch attempt is rate-limited (rotation, outages, bogus kids)
+            if not self._may_refresh_early():
+                return
+
+            self._last_attempt = time.monotonic()
+            try:
+                response = requests.get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+                jwks = response.json()
+            except (requests.RequestException, ValueError):
+                logger.exception("JWKS fetch failed; keeping %d cached keys", len(self._keys))
+                return
+
+            keys = {}
+            for data in jwks.get("keys", []):
+                try:
+                    keys[data["kid"]] = jwk.construct(data, data.get("alg", "RS256"))
+                except Exception:
+                    logger.warning("Skipping unusable JWKS key %s", data.get("kid"))
+
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+
+    def _is_stale(self):
+        ttl = self.ttl if self.ttl is not None else settings.AUTH0_JWKS_TTL
+        return self._fetched_at is None or time.monotonic() - self._fetched_at > ttl
+
+    def _may_refresh_early(self):
+        interval = (
+            self.min_refresh_interval
+            if self.min_refresh_interval is not None
+            else settings.AUTH0_JWKS_MIN_REFRESH_INTERVAL
+        )
+        return time.monotonic() - self._last_attempt >= interval
+
+
+jwks_store = JWKSKeyStore()
+
+
+def get_signing_key(token_header):
+    """Key for a token's unverified header, or None."""
+    kid = token_header.get("kid")
+    return jwks_store.get_key(kid) if kid else None
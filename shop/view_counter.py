@@ -0,0 +1,116 @@
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Product, ProductViewBucket
+
+logger = logging.getLogger(__name__)
+
+
+# =================================================
+# 👁 BUFFERED PRODUCT VIEW COUNTS
+# =================================================
+# Product page views are counted in memory and written back in batches
+# by a daemon thread every VIEW_COUNT_FLUSH_INTERVAL seconds, so the
+# detail endpoint does no writes on the hot path.
+
+_pending = Counter()
+_lock = threading.Lock()
+_stop = threading.Event()
+_flusher = None
+_flusher_pid = None
+
+
+def record_view(product_id):
+    with _lock:
+        _pending[product_id] += 1
+    _ensure_flusher()
+
+
+def flush_view_counts():
+    """
+    Write buffered views as `view_count = view_count + n`, one UPDATE per
+    distinct n (most products share small n, so this is a handful of
+    queries), and roll them into the current hour's ProductViewBucket for
+    the trending engine. F() makes every increment atomic; on failure the
+    batch is put back so no views are lost.
+    """
+    global _pending
+
+    with _lock:
+        batch, _pending = _pending, Counter()
+
+    if not batch:
+        return 0
+
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    try:
+        with transaction.atomic():
+            # products deleted since they were viewed would fail the FK
+            product_ids = set(
+                Product.objects.filter(id__in=batch).values_list("id", flat=True)
+            )
+
+            by_increment = defaultdict(list)
+            for product_id in product_ids:
+                by_increment[batch[product_id]].append(product_id)
+
+            # make sure this hour's buckets exist, then increment them
+            ProductViewBucket.objects.bulk_create(
+                [ProductViewBucket(product_id=pid, hour=hour) for pid in product_ids],
+                ignore_conflicts=True,
+            )
+            for views, ids in by_increment.items():
+                Product.objects.filter(id__in=ids).update(
+                    view_count=F("view_count") + views
+                )
+                ProductViewBucket.objects.filter(
+                    product_id__in=ids, hour=hour
+                ).update(views=F("views") + views)
+    except Exception:
+        logger.exception("View count flush failed; re-buffering %d products", len(batch))
+        with _lock:
+            _pending.update(batch)
+        return 0
+
+    return sum(batch.values())
+
+
+def _flush_loop():
+    while not _stop.wait(settings.VIEW_COUNT_FLUSH_INTERVAL):
+        close_old_connections()
+        flush_view_counts()
+
+
+def _ensure_flusher():
+    """Start one flusher thread per process (re-started after a fork)."""
+    global _flusher, _flusher_pid
+
+    if _flusher_pid == os.getpid() and _flusher.is_alive():
+        return
+
+    with _lock:
+        if _flusher_pid == os.getpid() and _flusher.is_alive():
+            return
+
+        _flusher = threading.Thread(
+            target=_flush_loop,
+            name="view-count-flusher",
+            daemon=True,
+        )
+        _flusher.start()
+        _flusher_pid = os.getpid()
+
+
+@atexit.register
+def _shutdown():
+    _stop.set()
+    flush_view_counts()
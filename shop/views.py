@@ -1,40 +1,63 @@
 from rest_framework import generics, status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed, MethodNotAllowed, NotFound, ParseError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
-import razorpay
 import hmac
 import hashlib
 import json
+from collections import defaultdict
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 
-from .models import Product, Address, Wishlist, Order, OrderItem
+from .models import (
+    Category,
+    Product,
+    ProductImage,
+    Address,
+    Wishlist,
+    Order,
+    OrderItem,
+    ArchivedOrder,
+)
 from .serializers import (
     ProductSerializer,
     AddressSerializer,
     WishlistSerializer,
     OrderSerializer,
+    ArchivedOrderSerializer,
+    ORDER_SUMMARY_FIELDS,
+    product_cards,
+    render_cards,
+    render_order_summaries,
 )
 from .permissions import IsAuthenticatedWithAuth0
-
-
-# =================================================
-# 🔐 SAFE RAZORPAY CLIENT (NO CRASH)
-# =================================================
-def get_razorpay_client():
-    if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
-        return None
-
-    return razorpay.Client(
-        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-    )
+from .pagination import CreatedAtCursorPagination, SortableCursorPagination, MergedRows
+from .cache import CatalogCacheMixin
+from .view_counter import record_view
+from .search import search_product_ids
+from .idempotency import idempotent
+from .order_status import PAID_STATUSES, check_lost_payment, mark_paid
+from .webhooks import enqueue, event_id_for
+from .payments import RAZORPAY_ERRORS, get_async_razorpay_client, verify_payment_signature
+from .images import image_url
+from .reservations import (
+    InsufficientStock,
+    take_stock,
+    reserve_stock,
+)
 
 
 # =================================================
@@ -56,45 +79,211 @@ class AddressView(generics.ListCreateAPIView):
 # =================================================
 # 🛒 PRODUCTS (PUBLIC)
 # =================================================
-class ProductListView(generics.ListAPIView):
-    queryset = Product.objects.prefetch_related("images").order_by("-created_at")
+class ProductCardMixin:
+    """
+    `?view=card` returns lightweight product cards (id, name, slug, price,
+    first image) built from `.values()` instead of full ProductSerializer
+    output. Other requests honour `?fields=` sparse fieldsets.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("view") != "card":
+            return super().list(request, *args, **kwargs)
+
+        queryset = product_cards(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(render_cards(page))
+
+        return Response(render_cards(queryset))
+
+
+class ProductListView(CatalogCacheMixin, ProductCardMixin, generics.ListAPIView):
+    queryset = Product.objects.with_available_stock().prefetch_related("images")
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CreatedAtCursorPagination
 
 
-class TrendingProductListView(generics.ListAPIView):
+class TrendingProductListView(CatalogCacheMixin, ProductCardMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        return Product.objects.prefetch_related("images").order_by("-view_count")[:10]
+        # precomputed by `manage.py compute_trending`
+        ranked = Product.objects.filter(trending__rank__isnull=False)
+        if ranked.exists():
+            return ranked.with_available_stock().prefetch_related(
+                "images"
+            ).order_by("trending__rank")[:10]
+
+        # ranking not computed yet: fall back to lifetime views
+        return Product.objects.with_available_stock().prefetch_related(
+            "images"
+        ).order_by("-view_count")[:10]
+
+
+class CategoryProductListView(CatalogCacheMixin, ProductCardMixin, generics.ListAPIView):
+    """
+    GET /api/categories/<slug>/products/?sort=newest|price|-price|popular
+    Each sort is served by a (category, <sort>, id) composite index; the
+    response also carries per-category product counts as facets.
+    """
+
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = SortableCursorPagination
+
+    SORTS = {
+        "newest": ("-created_at", "-id"),
+        "price": ("price", "id"),
+        "-price": ("-price", "-id"),
+        "popular": ("-view_count", "-id"),
+    }
+
+    def get_ordering(self):
+        return self.SORTS.get(self.request.query_params.get("sort"), self.SORTS["newest"])
+
+    def get_queryset(self):
+        self.category = get_object_or_404(Category, slug=self.kwargs["slug"])
+        return Product.objects.filter(
+            category=self.category
+        ).with_available_stock().prefetch_related("images")
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["category"] = {
+            "id": self.category.id,
+            "name": self.category.name,
+            "slug": self.category.slug,
+        }
+        response.data["facets"] = list(
+            Category.objects.values("id", "name", "slug", "product_count")
+        )
+        return response
+
+
+class ProductSearchView(CatalogCacheMixin, APIView):
+    """
+    GET /api/products/search/?q=<text>&page=<n>&page_size=<n>
+    Ranked full-text search over name + description (see shop/search.py).
+    """
+
+    permission_classes = [permissions.AllowAny]
+    max_page_size = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q required"}, status=400)
+
+        return super().get(request, *args, **kwargs)
+
+    def get_uncached(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(
+                max(int(request.query_params.get("page_size", settings.API_PAGE_SIZE)), 1),
+                self.max_page_size,
+            )
+        except ValueError:
+            page, page_size = 1, settings.API_PAGE_SIZE
 
+        # one extra row tells us whether there is a next page
+        ids = search_product_ids(query, page_size + 1, (page - 1) * page_size)
+        has_next = len(ids) > page_size
+        ids = ids[:page_size]
 
-class ProductDetailView(generics.RetrieveAPIView):
-    queryset = Product.objects.prefetch_related("images")
+        products = Product.objects.with_available_stock().prefetch_related("images").in_bulk(ids)
+        results = [products[pk] for pk in ids if pk in products]
+
+        return Response({
+            "next": (
+                replace_query_param(request.build_absolute_uri(), "page", page + 1)
+                if has_next else None
+            ),
+            "results": ProductSerializer(
+                results, many=True, context={"request": request}
+            ).data,
+        })
+
+
+class ProductBatchView(APIView):
+    """
+    GET /api/products/batch/?ids=1,2,3  or  ?slugs=a,b,c
+    Hydrates a cart / wishlist in one round trip: one IN query plus one
+    image prefetch, results in request order. Does not count views.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    max_batch_size = 50
+
+    def get(self, request):
+        if "ids" in request.query_params:
+            field, raw = "id", request.query_params["ids"]
+        elif "slugs" in request.query_params:
+            field, raw = "slug", request.query_params["slugs"]
+        else:
+            return Response({"error": "ids or slugs required"}, status=400)
+
+        keys = list(dict.fromkeys(key.strip() for key in raw.split(",") if key.strip()))
+
+        if len(keys) > self.max_batch_size:
+            return Response(
+                {"error": f"At most {self.max_batch_size} products per request"},
+                status=400
+            )
+
+        if field == "id":
+            try:
+                keys = [int(key) for key in keys]
+            except ValueError:
+                return Response({"error": "ids must be integers"}, status=400)
+
+        products = Product.objects.with_available_stock().prefetch_related("images").in_bulk(
+            keys, field_name=field
+        )
+
+        return Response(ProductSerializer(
+            [products[key] for key in keys if key in products],
+            many=True,
+            context={"request": request},
+        ).data)
+
+
+class ProductDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.with_available_stock().prefetch_related("images")
     serializer_class = ProductSerializer
     lookup_field = "slug"
     permission_classes = [permissions.AllowAny]
 
-    def get_object(self):
-        product = super().get_object()
-        Product.objects.filter(id=product.id).update(
-            view_count=product.view_count + 1
-        )
-        product.view_count += 1
-        return product
+    def get(self, request, *args, **kwargs):
+        entry = self.get_catalog_entry(request, *args, **kwargs)
+
+        # counted on cache hits and 304s too; buffered in memory and
+        # flushed in batches, so this endpoint stays read-only
+        record_view(entry["data"]["id"])
+        return self.catalog_response(request, entry)
 
 
 # =================================================
 # ❤️ WISHLIST
 # =================================================
+WISHLIST_PRODUCTS = Prefetch(
+    "product",
+    queryset=Product.objects.with_available_stock().prefetch_related("images"),
+)
+
+
 class WishlistView(APIView):
     permission_classes = [IsAuthenticatedWithAuth0]
 
     def get(self, request):
         wishlist = Wishlist.objects.filter(
             auth0_user_id=request.auth0_user_id
-        ).select_related("product").prefetch_related("product__images")
+        ).prefetch_related(WISHLIST_PRODUCTS)
 
         return Response(WishlistSerializer(wishlist, many=True).data)
 
@@ -118,7 +307,7 @@ class WishlistView(APIView):
 
         wishlist = Wishlist.objects.filter(
             auth0_user_id=request.auth0_user_id
-        ).select_related("product").prefetch_related("product__images")
+        ).prefetch_related(WISHLIST_PRODUCTS)
 
         return Response(WishlistSerializer(wishlist, many=True).data)
 
@@ -129,6 +318,7 @@ class WishlistView(APIView):
 class PlaceOrderView(APIView):
     permission_classes = [IsAuthenticatedWithAuth0]
 
+    @idempotent("place-order")
     @transaction.atomic
     def post(self, request):
         items = request.data.get("items")
@@ -140,6 +330,13 @@ class PlaceOrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # whole units only: zero or negative would corrupt the stock math
+        if any(type(item.get("quantity")) is not int or item["quantity"] < 1 for item in items):
+            return Response(
+                {"error": "quantity must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         address = Address.objects.filter(id=address_id).first()
         if not address:
             return Response({"error": "Address not found"}, status=404)
@@ -148,37 +345,48 @@ class PlaceOrderView(APIView):
             address.auth0_user_id = request.auth0_user_id
             address.save(update_fields=["auth0_user_id"])
 
+        # 1️⃣ Take the stock: shard counters for hot products, rows locked
+        #    in id order for the rest; any failure rolls the order back
+        quantities = defaultdict(int)
+        for item in items:
+            quantities[int(item["product_id"])] += item["quantity"]
+
+        try:
+            allocations = take_stock(quantities)
+        except Product.DoesNotExist:
+            raise NotFound("Product not found")
+        except InsufficientStock:
+            raise PermissionDenied("Insufficient stock")
+
+        # 2️⃣ Order + all items in two INSERTs; the history summary
+        #    (item count, first product's thumbnail) is stored on the order
+        total = sum(item["price"] * item["quantity"] for item in items)
+        preview = ProductImage.objects.filter(
+            product_id=int(items[0]["product_id"])
+        ).order_by("id").values_list("urls", "image").first()
+
         order = Order.objects.create(
             auth0_user_id=request.auth0_user_id,
             address=address,
-            total_amount=0,
+            total_amount=total,
             payment_method="razorpay",
             status="pending",
+            item_count=sum(quantities.values()),
+            preview_image=preview and image_url(*preview, "thumbnail") or "",
         )
 
-        total = 0
-        for item in items:
-            product = Product.objects.select_for_update().get(
-                id=item["product_id"]
-            )
-
-            if product.stock < item["quantity"]:
-                raise PermissionDenied("Insufficient stock")
-
-            product.stock -= item["quantity"]
-            product.save(update_fields=["stock"])
-
-            OrderItem.objects.create(
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
-                product=product,
+                product_id=int(item["product_id"]),
                 price=item["price"],
                 quantity=item["quantity"],
             )
+            for item in items
+        ])
 
-            total += item["price"] * item["quantity"]
-
-        order.total_amount = total
-        order.save(update_fields=["total_amount"])
+        # 3️⃣ Hold the stock until payment (or STOCK_RESERVATION_TTL)
+        reserve_stock(order, allocations)
 
         return Response(
             {"order_id": order.id, "total_amount": total},
@@ -190,98 +398,189 @@ class PlaceOrderView(APIView):
 # 📦 ORDER HISTORY
 # =================================================
 class OrderHistoryView(generics.ListAPIView):
+    """
+    Summary rows (status, total, item count, thumbnail) read straight from
+    Order columns: one query per page, whatever the orders contain.
+    Archived orders (shop/archive.py) are merged in by date, one more
+    indexed query per page. Items, products and address are on
+    OrderDetailView.
+    """
+
+    permission_classes = [IsAuthenticatedWithAuth0]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        user_id = self.request.auth0_user_id
+        return MergedRows(
+            Order.objects.filter(auth0_user_id=user_id).values(*ORDER_SUMMARY_FIELDS),
+            ArchivedOrder.objects.filter(auth0_user_id=user_id).values(*ORDER_SUMMARY_FIELDS),
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(render_order_summaries(page))
+
+
+class OrderDetailView(generics.RetrieveAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticatedWithAuth0]
 
     def get_queryset(self):
         return Order.objects.filter(
             auth0_user_id=self.request.auth0_user_id
-        ).prefetch_related(
-            "items__product",
-            "items__product__images"
+        ).select_related("address").prefetch_related(
+            "items",
+            Prefetch(
+                "items__product",
+                queryset=Product.objects.with_available_stock().prefetch_related("images"),
+            ),
         )
 
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(
+                ArchivedOrder, pk=kwargs["pk"], auth0_user_id=request.auth0_user_id
+            )
+            return Response(ArchivedOrderSerializer(archived).data)
+
+
+# =================================================
+# ⚡ ASYNC AUTH0 VIEW (PAYMENTS UNDER ASGI)
+# =================================================
+# Payment endpoints wait on Razorpay. As async views under an ASGI server
+# (crochetbackend/asgi.py) that wait costs no worker: the event loop keeps
+# serving the catalog meanwhile. Clients see what the APIView with
+# IsAuthenticatedWithAuth0 answered: the same checks, a 403 {"detail"}
+# for a bad token, 405 for other methods, and `request.data` parsed by
+# DRF's parsers (JSON, form, multipart).
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAuth0View(View):
+    permission = IsAuthenticatedWithAuth0()
+
+    async def dispatch(self, request, *args, **kwargs):
+        # the bearer check reads only the header (no DB access), so it
+        # needn't hold the ORM thread
+        drf_request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        check = sync_to_async(self.permission.has_permission, thread_sensitive=False)
+        try:
+            await check(drf_request, self)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": e.detail}, status=status.HTTP_403_FORBIDDEN)
+        request.auth0_user_id = drf_request.auth0_user_id
+
+        if request.method.lower() not in self.http_method_names or not hasattr(self, request.method.lower()):
+            return JsonResponse(
+                {"detail": MethodNotAllowed(request.method).detail},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                headers={"Allow": ", ".join(self._allowed_methods())},
+            )
+
+        try:
+            request.data = drf_request.data
+        except ParseError as e:
+            return JsonResponse({"detail": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return await super().dispatch(request, *args, **kwargs)
+
 
 # =================================================
 # 💳 CREATE RAZORPAY ORDER
 # =================================================
-class RazorpayCreateOrderView(APIView):
-    permission_classes = [IsAuthenticatedWithAuth0]
+class RazorpayCreateOrderView(AsyncAuth0View):
 
-    def post(self, request):
-        client = get_razorpay_client()
+    @idempotent("razorpay-create-order")
+    async def post(self, request):
+        client = get_async_razorpay_client(request)
         if not client:
-            return Response(
+            return JsonResponse(
                 {"error": "Razorpay not configured"},
                 status=503
             )
 
         order_id = request.data.get("order_id")
         if not order_id:
-            return Response({"error": "order_id required"}, status=400)
+            return JsonResponse({"error": "order_id required"}, status=400)
 
-        order = Order.objects.filter(
+        order = await Order.objects.filter(
             id=order_id,
             auth0_user_id=request.auth0_user_id
-        ).first()
+        ).only("id", "total_amount", "razorpay_order_id").afirst()
 
         if not order:
-            return Response({"error": "Order not found"}, status=404)
+            return JsonResponse({"error": "Order not found"}, status=404)
 
         amount_paise = int(order.total_amount * 100)
 
-        razorpay_order = client.order.create({
-            "amount": amount_paise,
-            "currency": "INR",
-        })
-
-        order.razorpay_order_id = razorpay_order["id"]
-        order.save(update_fields=["razorpay_order_id"])
-
-        return Response({
+        # a Razorpay order accepts repeated payment attempts: reuse it
+        if not order.razorpay_order_id:
+            try:
+                razorpay_order = await client.create_order({
+                    "amount": amount_paise,
+                    "currency": "INR",
+                })
+            except RAZORPAY_ERRORS:
+                return JsonResponse({"error": "Razorpay unavailable"}, status=502)
+
+            # set-if-unset: a concurrent first call may have won already
+            saved = await Order.objects.filter(
+                id=order.id, razorpay_order_id__isnull=True
+            ).aupdate(razorpay_order_id=razorpay_order["id"])
+
+            if saved:
+                order.razorpay_order_id = razorpay_order["id"]
+            else:
+                await order.arefresh_from_db(fields=["razorpay_order_id"])
+
+        return JsonResponse({
             "key": settings.RAZORPAY_KEY_ID,
             "amount": amount_paise,
             "currency": "INR",
-            "razorpay_order_id": razorpay_order["id"],
+            "razorpay_order_id": order.razorpay_order_id,
         })
 
 
 # =================================================
 # ✅ VERIFY PAYMENT
 # =================================================
-class RazorpayVerifyPaymentView(APIView):
-    permission_classes = [IsAuthenticatedWithAuth0]
+class RazorpayVerifyPaymentView(AsyncAuth0View):
 
-    def post(self, request):
-        client = get_razorpay_client()
-        if not client:
-            return Response(
+    async def post(self, request):
+        if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
+            return JsonResponse(
                 {"error": "Razorpay not configured"},
                 status=503
             )
 
         data = request.data
-
-        client.utility.verify_payment_signature({
-            "razorpay_order_id": data["razorpay_order_id"],
-            "razorpay_payment_id": data["razorpay_payment_id"],
-            "razorpay_signature": data["razorpay_signature"],
-        })
-
-        order = Order.objects.get(
-            razorpay_order_id=data["razorpay_order_id"]
+        fields = ("razorpay_order_id", "razorpay_payment_id", "razorpay_signature")
+        if not all(data.get(field) for field in fields):
+            return JsonResponse({"error": f"{', '.join(fields)} required"}, status=400)
+
+        if not verify_payment_signature(*(data[field] for field in fields)):
+            return JsonResponse({"error": "Invalid signature"}, status=400)
+
+        # only the request that moves the order out of pending commits stock
+        won = await sync_to_async(mark_paid)(
+            data["razorpay_order_id"],
+            razorpay_payment_id=data["razorpay_payment_id"],
+            razorpay_signature=data["razorpay_signature"],
         )
 
-        order.razorpay_payment_id = data["razorpay_payment_id"]
-        order.razorpay_signature = data["razorpay_signature"]
-        order.status = "paid"
-        order.save(update_fields=[
-            "razorpay_payment_id",
-            "razorpay_signature",
-            "status"
-        ])
+        if not won:
+            current = await sync_to_async(check_lost_payment)(
+                data["razorpay_order_id"], data["razorpay_payment_id"]
+            )
+            if current is None:
+                return JsonResponse({"error": "Order not found"}, status=404)
+            if current not in PAID_STATUSES:
+                return JsonResponse(
+                    {"error": f"Order is {current}", "status": current},
+                    status=409
+                )
 
-        return Response({"status": "success"})
+        return JsonResponse({"status": "success"})
 
 
 # =================================================
@@ -303,18 +602,15 @@ class RazorpayWebhookView(View):
             hashlib.sha256
         ).hexdigest()
 
-        if not hmac.compare_digest(expected_signature, signature):
+        if not hmac.compare_digest(expected_signature, signature or ""):
             return HttpResponse("Invalid signature", status=400)
 
-        data = json.loads(payload)
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return HttpResponse("Invalid payload", status=400)
 
-        if data.get("event") == "payment.captured":
-            payment = data["payload"]["payment"]["entity"]
-            Order.objects.filter(
-                razorpay_order_id=payment["order_id"]
-            ).update(
-                status="paid",
-                razorpay_payment_id=payment["id"]
-            )
+        # ack now; `manage.py process_webhooks` applies it (see shop/webhooks.py)
+        enqueue(event_id_for(request), data)
 
         return HttpResponse(status=200)
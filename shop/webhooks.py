@@ -0,0 +1,111 @@
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+from .order_status import check_lost_payment, mark_paid
+
+logger = logging.getLogger(__name__)
+
+
+# =================================================
+# 📥 RAZORPAY WEBHOOK INBOX
+# =================================================
+# The webhook view only verifies the signature and appends the event to
+# WebhookEvent (unique event_id, so Razorpay's retries are dropped on
+# insert), then answers 200. `manage.py process_webhooks` drains the
+# inbox in batches; SELECT ... FOR UPDATE SKIP LOCKED lets several
+# workers run without claiming the same rows. A failed event waits
+# RETRY_BACKOFF * 2^(attempts - 1) before its next try, so an outage
+# doesn't burn every attempt in a few milliseconds.
+
+# failing events are retried this many times, then left for a human
+MAX_ATTEMPTS = 5
+
+# delay before the first retry (seconds); doubles after each failure
+RETRY_BACKOFF = 30
+
+
+def event_id_for(request):
+    return (
+        request.headers.get("X-Razorpay-Event-Id")
+        or hashlib.sha256(request.body).hexdigest()
+    )
+
+
+def enqueue(event_id, payload):
+    """Store a verified event; a repeat of a stored event_id is a no-op."""
+    WebhookEvent.objects.bulk_create(
+        [WebhookEvent(event_id=event_id, event=payload.get("event", ""), payload=payload)],
+        ignore_conflicts=True,
+    )
+
+
+# -------------------------------------------------
+# HANDLERS
+# -------------------------------------------------
+def handle_payment_captured(payload):
+    payment = payload["payload"]["payment"]["entity"]
+
+    # duplicate deliveries match no pending row and write nothing; a
+    # capture on an order that can't be paid any more is logged
+    if not mark_paid(payment["order_id"], razorpay_payment_id=payment["id"]):
+        check_lost_payment(payment["order_id"], payment["id"])
+
+
+HANDLERS = {
+    "payment.captured": handle_payment_captured,
+}
+
+
+# -------------------------------------------------
+# WORKER
+# -------------------------------------------------
+def process_webhook_events(batch_size=100):
+    """
+    Claim and apply one batch of due, unprocessed events. Each event runs
+    in its own savepoint: a failure is recorded on the row, which is
+    retried after a backoff, and the rest of the batch still commits.
+    Returns the number of events claimed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                processed_at__isnull=True,
+                attempts__lt=MAX_ATTEMPTS,
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+
+        for event in events:
+            handler = HANDLERS.get(event.event)
+            try:
+                if handler:
+                    with transaction.atomic():
+                        handler(event.payload)
+            except Exception as exc:
+                logger.exception("Webhook event %s failed", event.event_id)
+                event.attempts += 1
+                event.last_error = repr(exc)
+                event.next_attempt_at = now + timedelta(
+                    seconds=RETRY_BACKOFF * 2 ** (event.attempts - 1)
+                )
+            else:
+                event.processed_at = now
+
+        WebhookEvent.objects.bulk_update(
+            events, ["processed_at", "attempts", "last_error", "next_attempt_at"]
+        )
+
+    return len(events)
+
+
+def prune_processed_events(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return WebhookEvent.objects.filter(processed_at__lt=cutoff).delete()[0]